@@ -8,69 +8,102 @@ Most settings can be changed by creating a .env file in the project root.
 If a setting isn't in .env, it uses the default value shown here.
 """
 import os
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables from .env file (if it exists)
-# This lets you configure the app without changing code
-load_dotenv()
+# Set once the .env file has been read, so repeated get_settings() calls
+# (e.g. after cache_clear() in tests) don't parse it again
+_LOADED = False
 
 
+def _load_env_once():
+    """Load environment variables from .env file (if it exists), only once per process"""
+    global _LOADED
+    if not _LOADED:
+        # This lets you configure the app without changing code
+        load_dotenv()
+        _LOADED = True
+
+
+def _to_bool(value: str) -> bool:
+    """Interpret "true"/"false" style environment values"""
+    return value.lower() == "true"
+
+
+def _env(name: str, default: str, cast=str):
+    """Dataclass field whose default is read from the environment when Settings is built"""
+    return field(default_factory=lambda: cast(os.getenv(name, default)))
+
+
+@dataclass(slots=True)
 class Settings:
     """
     Application configuration settings
-    
+
     This class holds all the configuration for the entire application.
     You can change these values by setting environment variables in a .env file.
+    Use get_settings() to get the shared instance instead of creating a new one.
     """
-    
+
     # ============================================================
     # App Store URLs
     # ============================================================
     # These are the web addresses where the app is listed
     # The system uses these to find and download reviews
-    APP_STORE_URL = os.getenv(
+    APP_STORE_URL: str = _env(
         "APP_STORE_URL",
         "https://apps.apple.com/in/app/groww-stocks-mutual-fund-ipo/id1404871703"
     )
-    PLAY_STORE_URL = os.getenv(
+    PLAY_STORE_URL: str = _env(
         "PLAY_STORE_URL",
         "https://play.google.com/store/apps/details?id=com.nextbillion.groww&hl=en_IN"
     )
-    
+
     # ============================================================
     # App IDs
     # ============================================================
     # Unique identifiers for the app in each store
     # Used to find the right app when scraping reviews
-    ANDROID_APP_ID = os.getenv("ANDROID_APP_ID", "com.nextbillion.groww")
-    APPLE_APP_ID = os.getenv("APPLE_APP_ID", "1404871703")
-    
+    ANDROID_APP_ID: str = _env("ANDROID_APP_ID", "com.nextbillion.groww")
+    APPLE_APP_ID: str = _env("APPLE_APP_ID", "1404871703")
+
     # ============================================================
     # Review Import Settings
     # ============================================================
     # How far back to look for reviews
     # Default: Get reviews from the past 12 weeks (but not the last 7 days)
     # Why exclude last 7 days? Because reviews from today might not be complete yet
-    WEEKS_TO_FETCH = int(os.getenv("WEEKS_TO_FETCH", "12"))  # 8-12 weeks
-    LOOKBACK_DAYS = WEEKS_TO_FETCH * 7  # Convert weeks to days (12 weeks = 84 days)
-    DAYS_BACK_START = int(os.getenv("DAYS_BACK_START", "84"))  # Start from 12 weeks ago
-    DAYS_BACK_END = int(os.getenv("DAYS_BACK_END", "7"))  # Stop 7 days ago (exclude recent)
-    
+    WEEKS_TO_FETCH: int = _env("WEEKS_TO_FETCH", "12", int)  # 8-12 weeks
+    LOOKBACK_DAYS: int = field(init=False)  # Convert weeks to days (12 weeks = 84 days)
+    DAYS_BACK_START: int = _env("DAYS_BACK_START", "84", int)  # Start from 12 weeks ago
+    DAYS_BACK_END: int = _env("DAYS_BACK_END", "7", int)  # Stop 7 days ago (exclude recent)
+    _START_DELTA: timedelta = field(init=False, repr=False)  # DAYS_BACK_START as a timedelta
+    _END_DELTA: timedelta = field(init=False, repr=False)  # DAYS_BACK_END as a timedelta
+    # Most Play Store page requests to send in any one minute
+    # (the scraper adapts its pace below this cap)
+    PLAY_STORE_REQUESTS_PER_MINUTE: int = _env("PLAY_STORE_REQUESTS_PER_MINUTE", "60", int)
+
     # ============================================================
     # Storage Settings
     # ============================================================
     # Where to save all the data files
     # All data is stored in JSON files organized by week
-    DATA_DIR = os.getenv("DATA_DIR", "data")  # Main data folder
-    REVIEWS_DIR = os.path.join(DATA_DIR, "reviews")  # Where processed reviews go
-    RAW_REVIEWS_DIR = os.path.join(DATA_DIR, "reviews", "raw")  # Original reviews before cleaning
-    THEMES_DIR = os.path.join(DATA_DIR, "themes")  # Reviews organized by theme
-    PULSES_DIR = os.path.join(DATA_DIR, "pulses")  # Weekly summary reports
-    EMAILS_DIR = os.path.join(DATA_DIR, "emails")  # Email templates
-    CACHE_DIR = os.path.join(DATA_DIR, "cache")  # Temporary cache files
-    CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", os.path.join(CACHE_DIR, "chroma"))  # Vector database for similarity search
-    
+    DATA_DIR: str = _env("DATA_DIR", "data")  # Main data folder
+    # Indent the week JSON files so they're easy to read by hand; compact
+    # files are smaller and faster to write and load
+    PRETTY_JSON: bool = _env("PRETTY_JSON", "false", _to_bool)
+    REVIEWS_DIR: str = field(init=False)  # Where processed reviews go
+    RAW_REVIEWS_DIR: str = field(init=False)  # Original reviews before cleaning
+    THEMES_DIR: str = field(init=False)  # Reviews organized by theme
+    PULSES_DIR: str = field(init=False)  # Weekly summary reports
+    EMAILS_DIR: str = field(init=False)  # Email templates
+    CACHE_DIR: str = field(init=False)  # Temporary cache files
+    CHROMA_DB_DIR: str = field(init=False)  # Vector database for similarity search
+    FASTTEXT_LID_MODEL: str = field(init=False)  # Optional fastText language ID model (lid.176.ftz)
+
     # ============================================================
     # Gemini API Settings
     # ============================================================
@@ -79,115 +112,163 @@ class Settings:
     # - Generate summaries
     # - Write emails
     # You need an API key from Google to use this
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")  # Your Google API key (required!)
-    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")  # Which AI model to use
+    GEMINI_API_KEY: str = _env("GEMINI_API_KEY", "")  # Your Google API key (required!)
+    GEMINI_MODEL: str = _env("GEMINI_MODEL", "gemini-1.5-flash")  # Which AI model to use
     # Options: gemini-1.5-flash (fast, cheap), gemini-1.5-pro (slower, smarter)
-    GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "models/gemini-embedding-001")  # For similarity search
-    
+    GEMINI_EMBEDDING_MODEL: str = _env("GEMINI_EMBEDDING_MODEL", "models/gemini-embedding-001")  # For similarity search
+
     # ============================================================
     # LLM Batching & Rate Limiting
     # ============================================================
     # These settings control how we send requests to the AI
     # Batching = sending multiple reviews at once (faster, cheaper)
     # Rate limiting = waiting between requests (to avoid hitting API limits)
-    LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "100"))  # How many reviews to send at once
-    LLM_MAX_TOKENS_PER_BATCH = int(os.getenv("LLM_MAX_TOKENS_PER_BATCH", "800000"))  # Max text per batch
-    LLM_EMBEDDING_BATCH_SIZE = int(os.getenv("LLM_EMBEDDING_BATCH_SIZE", "100"))  # Batch size for embeddings
-    LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "5"))  # How many times to retry if it fails
-    LLM_RETRY_DELAY_BASE = float(os.getenv("LLM_RETRY_DELAY_BASE", "2.0"))  # Wait 2 seconds between retries
-    LLM_BATCH_DELAY = float(os.getenv("LLM_BATCH_DELAY", "2.0"))  # Wait 2 seconds between batches
-    LLM_RATE_LIMIT_DELAY = float(os.getenv("LLM_RATE_LIMIT_DELAY", "15.0"))  # Wait 15 seconds if rate limited
-    
+    LLM_BATCH_SIZE: int = _env("LLM_BATCH_SIZE", "100", int)  # How many reviews to send at once
+    LLM_MAX_TOKENS_PER_BATCH: int = _env("LLM_MAX_TOKENS_PER_BATCH", "800000", int)  # Max text per batch
+    LLM_EMBEDDING_BATCH_SIZE: int = _env("LLM_EMBEDDING_BATCH_SIZE", "100", int)  # Batch size for embeddings
+    LLM_RETRY_ATTEMPTS: int = _env("LLM_RETRY_ATTEMPTS", "5", int)  # How many times to retry if it fails
+    LLM_RETRY_DELAY_BASE: float = _env("LLM_RETRY_DELAY_BASE", "2.0", float)  # Wait 2 seconds between retries
+    LLM_BATCH_DELAY: float = _env("LLM_BATCH_DELAY", "2.0", float)  # Wait 2 seconds between batches
+    LLM_REQUESTS_PER_MINUTE: int = _env("LLM_REQUESTS_PER_MINUTE", "15", int)  # API request quota (classification, summaries)
+    LLM_TOKENS_PER_MINUTE: int = _env("LLM_TOKENS_PER_MINUTE", "1000000", int)  # API token quota (classification, summaries)
+    LLM_CONCURRENCY: int = _env("LLM_CONCURRENCY", "4", int)  # How many batches can be waiting on the AI at once (across all weeks)
+    WEEK_CONCURRENCY: int = _env("WEEK_CONCURRENCY", "4", int)  # How many weeks are classified (or summarized) at once
+    LLM_RATE_LIMIT_DELAY: float = _env("LLM_RATE_LIMIT_DELAY", "15.0", float)  # Wait 15 seconds if rate limited
+    LLM_MAX_BACKOFF: float = _env("LLM_MAX_BACKOFF", "120.0", float)  # Longest wait between retries
+    # After several batches in a row fail every retry, the AI is assumed to be
+    # down: remaining batches get fallback themes right away for this long
+    LLM_CIRCUIT_COOLDOWN: float = _env("LLM_CIRCUIT_COOLDOWN", "300.0", float)
+    # Remember each review's classification so reruns (and force_regenerate)
+    # don't send the same review to the AI again
+    LLM_CACHE_ENABLED: bool = _env("LLM_CACHE_ENABLED", "true", _to_bool)
+
     # ============================================================
     # Clustering Settings
     # ============================================================
     # These control how reviews are grouped together
     # (Currently not heavily used, but available for future features)
-    HDBSCAN_MIN_CLUSTER_SIZE = int(os.getenv("HDBSCAN_MIN_CLUSTER_SIZE", "5"))  # Min reviews to form a group
-    HDBSCAN_MIN_SAMPLES = int(os.getenv("HDBSCAN_MIN_SAMPLES", "2"))  # Min samples for clustering
-    MAX_THEME_CLUSTERS = int(os.getenv("MAX_THEME_CLUSTERS", "5"))  # Max number of theme groups
-    
+    HDBSCAN_MIN_CLUSTER_SIZE: int = _env("HDBSCAN_MIN_CLUSTER_SIZE", "5", int)  # Min reviews to form a group
+    HDBSCAN_MIN_SAMPLES: int = _env("HDBSCAN_MIN_SAMPLES", "2", int)  # Min samples for clustering
+    MAX_THEME_CLUSTERS: int = _env("MAX_THEME_CLUSTERS", "5", int)  # Max number of theme groups
+
     # ============================================================
     # Layer-2 Review Processing Limit
     # ============================================================
     # For testing: limit how many reviews to process per week
     # Set to 0 for no limit (process all reviews)
     # Set to 100 to only process first 100 reviews (useful for testing)
-    MAX_REVIEWS_PER_WEEK = int(os.getenv("MAX_REVIEWS_PER_WEEK", "0"))  # 0 = no limit
-    
+    MAX_REVIEWS_PER_WEEK: int = _env("MAX_REVIEWS_PER_WEEK", "0", int)  # 0 = no limit
+
     # ============================================================
     # Scheduler Settings (for cron)
     # ============================================================
     # When to automatically run the import process
     # Default: Every Monday at 9:00 AM
-    SCHEDULE_DAY = os.getenv("SCHEDULE_DAY", "monday")  # Day of week (monday, tuesday, etc.)
-    SCHEDULE_HOUR = int(os.getenv("SCHEDULE_HOUR", "9"))  # Hour (24-hour format, 9 = 9 AM)
-    SCHEDULE_MINUTE = int(os.getenv("SCHEDULE_MINUTE", "0"))  # Minute (0 = on the hour)
-    
+    SCHEDULE_DAY: str = _env("SCHEDULE_DAY", "monday")  # Day of week (monday, tuesday, etc.)
+    SCHEDULE_HOUR: int = _env("SCHEDULE_HOUR", "9", int)  # Hour (24-hour format, 9 = 9 AM)
+    SCHEDULE_MINUTE: int = _env("SCHEDULE_MINUTE", "0", int)  # Minute (0 = on the hour)
+
     # ============================================================
     # Logging Settings
     # ============================================================
     # How much detail to log
     # Options: DEBUG (very detailed), INFO (normal), WARNING (only problems), ERROR (only errors)
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")  # Where to save log files
-    
+    LOG_LEVEL: str = _env("LOG_LEVEL", "INFO")
+    LOG_FILE: str = _env("LOG_FILE", "logs/app.log")  # Where to save log files
+
     # ============================================================
     # Email Settings
     # ============================================================
     # Configuration for sending emails
     # For Gmail: You need to create an "App Password" (not your regular password)
     # See README for instructions on setting up Gmail
-    PRODUCT_NAME = os.getenv("PRODUCT_NAME", "Groww")  # Name of your product (appears in emails)
-    SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")  # Email server (Gmail by default)
-    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))  # Port number (587 for Gmail with TLS)
-    SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")  # Your email address
-    SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")  # Your App Password (for Gmail)
-    FROM_EMAIL = os.getenv("FROM_EMAIL", "")  # Email address to send from
-    TO_EMAIL = os.getenv("TO_EMAIL", "")  # Email address to send to
-    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"  # Use encryption (required for Gmail)
-    
-    @staticmethod
-    def get_date_range():
+    PRODUCT_NAME: str = _env("PRODUCT_NAME", "Groww")  # Name of your product (appears in emails)
+    SMTP_SERVER: str = _env("SMTP_SERVER", "smtp.gmail.com")  # Email server (Gmail by default)
+    SMTP_PORT: int = _env("SMTP_PORT", "587", int)  # Port number (587 for Gmail with TLS)
+    SMTP_USERNAME: str = _env("SMTP_USERNAME", "")  # Your email address
+    SMTP_PASSWORD: str = _env("SMTP_PASSWORD", "")  # Your App Password (for Gmail)
+    FROM_EMAIL: str = _env("FROM_EMAIL", "")  # Email address to send from
+    TO_EMAIL: str = _env("TO_EMAIL", "")  # Email address to send to
+    SMTP_USE_TLS: bool = _env("SMTP_USE_TLS", "true", _to_bool)  # Use encryption (required for Gmail)
+
+    # Folders already created by ensure_directories() (internal)
+    _ensured_dirs: tuple = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Fill in the settings that are derived from other settings"""
+        self.LOOKBACK_DAYS = self.WEEKS_TO_FETCH * 7
+        self._START_DELTA = timedelta(days=self.DAYS_BACK_START)
+        self._END_DELTA = timedelta(days=self.DAYS_BACK_END)
+        self.REVIEWS_DIR = os.path.join(self.DATA_DIR, "reviews")
+        self.RAW_REVIEWS_DIR = os.path.join(self.DATA_DIR, "reviews", "raw")
+        self.THEMES_DIR = os.path.join(self.DATA_DIR, "themes")
+        self.PULSES_DIR = os.path.join(self.DATA_DIR, "pulses")
+        self.EMAILS_DIR = os.path.join(self.DATA_DIR, "emails")
+        self.CACHE_DIR = os.path.join(self.DATA_DIR, "cache")
+        self.CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", os.path.join(self.CACHE_DIR, "chroma"))
+        self.FASTTEXT_LID_MODEL = os.getenv("FASTTEXT_LID_MODEL", os.path.join(self.CACHE_DIR, "lid.176.ftz"))
+
+    def get_date_range(self):
         """
         Get the date range for review import
-        
+
         This calculates what date range to fetch reviews from.
         Example: If today is Dec 1, and DAYS_BACK_START=84, DAYS_BACK_END=7:
         - Start date: Dec 1 - 84 days = Sep 8
         - End date: Dec 1 - 7 days = Nov 24
         So we'd fetch reviews from Sep 8 to Nov 24
-        
+
         Returns:
             Tuple of (start_date, end_date) - the date range to fetch reviews from
         """
         today = datetime.now()
-        end_date = today - timedelta(days=Settings.DAYS_BACK_END)  # Go back this many days
-        start_date = today - timedelta(days=Settings.DAYS_BACK_START)  # Start from this many days ago
+        end_date = today - self._END_DELTA  # Go back DAYS_BACK_END days
+        start_date = today - self._START_DELTA  # Start from DAYS_BACK_START days ago
         return start_date, end_date
-    
-    @staticmethod
-    def ensure_directories():
+
+    def ensure_directories(self):
         """
         Create necessary directories if they don't exist
-        
+
         This makes sure all the folders we need exist.
         Like creating folders on your computer - if they don't exist, create them.
         This prevents errors when trying to save files.
+        Calling it again with the same paths does nothing.
         """
-        import os
-        # Create all the folders we need for storing data
-        os.makedirs(Settings.DATA_DIR, exist_ok=True)  # Main data folder
-        os.makedirs(Settings.REVIEWS_DIR, exist_ok=True)  # Processed reviews
-        os.makedirs(Settings.RAW_REVIEWS_DIR, exist_ok=True)  # Raw reviews
-        os.makedirs(Settings.THEMES_DIR, exist_ok=True)  # Theme files
-        os.makedirs(Settings.PULSES_DIR, exist_ok=True)  # Pulse files
-        os.makedirs(Settings.EMAILS_DIR, exist_ok=True)  # Email templates
-        os.makedirs(Settings.CACHE_DIR, exist_ok=True)  # Cache
-        os.makedirs(Settings.CHROMA_DB_DIR, exist_ok=True)  # Vector database
-        # Create logs folder (extract folder name from log file path)
-        os.makedirs(os.path.dirname(Settings.LOG_FILE) if os.path.dirname(Settings.LOG_FILE) else "logs", exist_ok=True)
-
-
-# Global settings instance
-settings = Settings()
+        # All the folders we need for storing data. DATA_DIR itself is
+        # created as a parent of the others.
+        directories = (
+            self.RAW_REVIEWS_DIR,  # Raw reviews (creates DATA_DIR and REVIEWS_DIR too)
+            self.THEMES_DIR,  # Theme files
+            self.PULSES_DIR,  # Pulse files
+            self.EMAILS_DIR,  # Email templates
+            self.CHROMA_DB_DIR,  # Vector database
+            self.CACHE_DIR,  # Cache
+            # Logs folder (extract folder name from log file path)
+            os.path.dirname(self.LOG_FILE) or "logs",
+        )
+        # Skip the syscalls if these exact folders were already created
+        if directories == self._ensured_dirs:
+            return
+        for directory in directories:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        self._ensured_dirs = directories
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the shared settings instance
+
+    The .env file is read and the environment is parsed only the first time
+    this is called; every later call returns the same Settings object.
+
+    Returns:
+        Settings instance
+    """
+    _load_env_once()
+    return Settings()
+
+
+# Global settings instance (kept so `from config.settings import settings` keeps working)
+settings = get_settings()
@@ -5,10 +5,23 @@ Layer 1: Data Import & Validation
 - PII Detector (early filtering)
 - Language Detector (filter semantically English reviews)
 - Deduplication (avoid processing same review twice)
+
+Submodules are imported lazily on first attribute access (PEP 562), so
+importing the package doesn't pull in the scraper or language detection
+libraries unless they are actually used.
 """
-from .scraper import fetch_all_reviews, PlayStoreScraper
-from .validator import ReviewValidator, PIIDetector, TextCleaner, LanguageDetector
-from .deduplicator import ReviewDeduplicator
+import importlib
+
+# Public name -> module that defines it
+_LAZY = {
+    'fetch_all_reviews': 'layer_1_data_import.scraper',
+    'PlayStoreScraper': 'layer_1_data_import.scraper',
+    'ReviewValidator': 'layer_1_data_import.validator',
+    'PIIDetector': 'layer_1_data_import.validator',
+    'TextCleaner': 'layer_1_data_import.validator',
+    'LanguageDetector': 'layer_1_data_import.validator',
+    'ReviewDeduplicator': 'layer_1_data_import.deduplicator',
+}
 
 __all__ = [
     'fetch_all_reviews',
@@ -19,3 +32,16 @@ __all__ = [
     'LanguageDetector',
     'ReviewDeduplicator',
 ]
+
+
+def __getattr__(name):
+    """Import the defining submodule the first time a public name is used"""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,18 +1,40 @@
 """
 Deduplication logic to avoid processing same review twice
 """
-import json
+import hashlib
+import mmap
 import os
-from typing import List, Dict, Set
+from array import array
+from typing import Dict, Iterable, List, Set
 
 from config.settings import settings
+from utils import json_utils
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bytes per cached hash (one unsigned 64-bit int)
+_ENTRY_SIZE = array('Q').itemsize
+
+
+def _hash_id(review_id: str) -> int:
+    """
+    Stable 64-bit hash of a review ID
+    
+    Collisions are negligible (~1e-6 chance across 10M IDs), and an int costs
+    far less memory than the ~40-char ID string it replaces.
+    """
+    return int.from_bytes(hashlib.blake2b(review_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
 
 class ReviewDeduplicator:
-    """Handle review deduplication using cached review IDs"""
+    """
+    Handle review deduplication using cached review IDs
+    
+    IDs are kept as 64-bit hashes. The cache file is an append-only array of
+    unsigned 64-bit ints, so saving only writes the hashes added since the
+    last save instead of the whole set.
+    """
     
     def __init__(self, cache_file: str = None):
         """
@@ -21,30 +43,104 @@ class ReviewDeduplicator:
         Args:
             cache_file: Path to cache file storing processed review IDs
         """
-        self.cache_file = cache_file or os.path.join(settings.CACHE_DIR, "processed_reviews.json")
-        self.processed_ids: Set[str] = self._load_cache()
+        self.cache_file = cache_file or os.path.join(settings.CACHE_DIR, "processed_reviews.bin")
+        self._pending_ids: List[int] = []  # Marked as processed but not yet written
+        self._entries_on_disk = 0
+        self._torn_tail = False  # File ends in a partial entry; appends would be misaligned
+        self.processed_ids: Set[int] = self._load_cache()
     
-    def _load_cache(self) -> Set[str]:
-        """Load processed review IDs from cache file"""
-        if os.path.exists(self.cache_file):
+    def _load_cache(self) -> Set[int]:
+        """Load processed review ID hashes from cache file"""
+        if not os.path.exists(self.cache_file):
+            return self._load_legacy_cache()
+        
+        try:
+            with open(self.cache_file, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                # Ignore a partially written trailing entry
+                usable = size - size % _ENTRY_SIZE
+                if not usable:
+                    processed_ids = set()
+                else:
+                    # Build the set straight from the memory-mapped file: no
+                    # intermediate copy, and concurrent importers share the
+                    # OS page cache for it
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                            memoryview(mm) as view, \
+                            view[:usable] as entries, \
+                            entries.cast('Q') as hashes:
+                        processed_ids = set(hashes)
+        except Exception as e:
+            logger.warning(f"Error loading cache file: {e}")
+            return set()
+        self._entries_on_disk = usable // _ENTRY_SIZE
+        self._torn_tail = usable != size
+        return processed_ids
+    
+    def _load_legacy_cache(self) -> Set[int]:
+        """
+        Load IDs from an older text cache next to the cache file, if any
+        
+        Supports the one-ID-per-line log (processed_reviews.jsonl) and the
+        original single JSON document (processed_reviews.json). The hashes are
+        queued so the next save writes them into the new cache file.
+        """
+        base = os.path.splitext(self.cache_file)[0]
+        review_ids = None
+        for legacy_file in (base + '.jsonl', base + '.json'):
+            if legacy_file == self.cache_file or not os.path.exists(legacy_file):
+                continue
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return set(data.get('review_ids', []))
+                if legacy_file.endswith('.jsonl'):
+                    with open(legacy_file, 'r', encoding='utf-8') as f:
+                        review_ids = [line for line in f.read().split('\n') if line]
+                else:
+                    review_ids = json_utils.load_file(legacy_file).get('review_ids', [])
+                break
             except Exception as e:
-                logger.warning(f"Error loading cache file: {e}")
-                return set()
-        return set()
+                logger.warning(f"Error loading legacy cache file {legacy_file}: {e}")
+        
+        if not review_ids:
+            return set()
+        processed_ids = {_hash_id(review_id) for review_id in review_ids}
+        self._pending_ids.extend(processed_ids)
+        return processed_ids
     
     def _save_cache(self):
-        """Save processed review IDs to cache file"""
+        """Append newly processed review ID hashes to cache file"""
+        # Rewrite the file if it has accumulated many redundant entries
+        # (e.g. from several importers appending the same IDs), or if it ends
+        # in a partial entry that would shift everything appended after it
+        if self._torn_tail or self._entries_on_disk > 2 * len(self.processed_ids):
+            self._compact_cache()
+            return
+        
+        if not self._pending_ids:
+            return
+        
         try:
             os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump({'review_ids': list(self.processed_ids)}, f, indent=2)
+            with open(self.cache_file, 'ab') as f:
+                array('Q', self._pending_ids).tofile(f)
+            self._entries_on_disk += len(self._pending_ids)
+            self._pending_ids = []
         except Exception as e:
             logger.error(f"Error saving cache file: {e}")
     
+    def _compact_cache(self):
+        """Rewrite cache file with exactly one entry per processed review ID"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                array('Q', self.processed_ids).tofile(f)
+            os.replace(tmp_file, self.cache_file)
+            self._entries_on_disk = len(self.processed_ids)
+            self._pending_ids = []
+            self._torn_tail = False
+        except Exception as e:
+            logger.error(f"Error compacting cache file: {e}")
+    
     def is_duplicate(self, review_id: str) -> bool:
         """
         Check if review ID has been processed before
@@ -55,7 +151,7 @@ class ReviewDeduplicator:
         Returns:
             True if duplicate, False otherwise
         """
-        return review_id in self.processed_ids
+        return _hash_id(review_id) in self.processed_ids
     
     def mark_as_processed(self, review_id: str):
         """
@@ -64,33 +160,46 @@ class ReviewDeduplicator:
         Args:
             review_id: Review ID to mark
         """
-        self.processed_ids.add(review_id)
+        id_hash = _hash_id(review_id)
+        if id_hash not in self.processed_ids:
+            self.processed_ids.add(id_hash)
+            self._pending_ids.append(id_hash)
+    
+    def save(self):
+        """Persist review IDs marked with mark_as_processed()"""
+        self._save_cache()
     
-    def filter_duplicates(self, reviews: List[Dict]) -> List[Dict]:
+    def filter_duplicates(self, reviews: Iterable[Dict]) -> List[Dict]:
         """
         Filter out duplicate reviews
         
         Args:
-            reviews: List of review dictionaries
+            reviews: Review dictionaries (any iterable, consumed once)
         
         Returns:
             List of unique reviews
         """
         unique_reviews = []
         duplicates_count = 0
+        missing_id_count = 0
         
         for review in reviews:
             review_id = review.get('review_id')
             if not review_id:
-                logger.warning("Review missing review_id, skipping")
+                missing_id_count += 1
                 continue
             
-            if not self.is_duplicate(review_id):
+            # Hash once and reuse it for both the lookup and the insert
+            id_hash = _hash_id(review_id)
+            if id_hash not in self.processed_ids:
                 unique_reviews.append(review)
-                self.mark_as_processed(review_id)
+                self.processed_ids.add(id_hash)
+                self._pending_ids.append(id_hash)
             else:
                 duplicates_count += 1
         
+        if missing_id_count > 0:
+            logger.warning(f"Skipped {missing_id_count} reviews with no review_id")
         if duplicates_count > 0:
             logger.info(f"Filtered out {duplicates_count} duplicate reviews")
         
@@ -8,19 +8,51 @@ Think of it like a quality control process:
 - It removes duplicates
 - It organizes reviews by week (Monday to Sunday)
 """
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from config.settings import settings
 from models.review import Review
 from layer_1_data_import.scraper import fetch_all_reviews
-from layer_1_data_import.validator import ReviewValidator, TextCleaner, PIIDetector, LanguageDetector
+from layer_1_data_import.validator import ReviewValidator, LanguageDetector
 from layer_1_data_import.deduplicator import ReviewDeduplicator
 from layer_1_data_import.storage import ReviewStorage
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Rejection reasons in reporting order, with how each is described in the log
+_FILTER_LABELS = [
+    ('emoji', 'reviews with emojis'),
+    ('pii', 'reviews with PII'),
+    ('non_english', 'non-English reviews'),
+    ('too_short', 'reviews with less than 20 characters'),
+    ('validation_error', 'reviews with validation errors'),
+]
+
+# Below this many reviews, starting worker processes costs more than it saves
+_PARALLEL_MIN_REVIEWS = 1000
+
+
+def _validate_one(raw_review: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Run all quality checks on one raw review
+    
+    Kept at module level so it can be sent to worker processes.
+    
+    Args:
+        raw_review: Raw review dictionary from the scraper
+    
+    Returns:
+        (processed_review, None) if the review passed, or (None, reason)
+        where reason is one of the filtered_stats keys in import_reviews()
+    """
+    # Each check runs once; the reason comes from the check that failed
+    # instead of re-cleaning and re-detecting the language afterwards
+    return ReviewValidator.check_review(raw_review)
+
 
 def import_reviews() -> List[Review]:
     """
@@ -91,64 +123,35 @@ def import_reviews() -> List[Review]:
     logger.info("    - Reviews with PII will be rejected")
     logger.info("    - Reviews with less than 20 characters (after cleaning) will be rejected")
     
-    # These lists will hold our results
-    processed_reviews = []  # Reviews that passed all checks
-    filtered_stats = {      # Count of reviews we rejected and why
-        'emoji': 0,         # How many had emojis
-        'pii': 0,           # How many had personal info
-        'non_english': 0,   # How many weren't in English
-        'too_short': 0,     # How many were too short
-        'validation_error': 0  # How many had other problems
-    }
-    
-    # Go through each review one by one and check it
-    for raw_review in raw_reviews:
-        original_text = raw_review.get('text', '')  # Get the review text
-        review_id = raw_review.get('review_id', 'unknown')  # Get the review ID
-        
-        # Check if review has emojis (like 😀 or ❤️)
-        # If it does, skip it and count it in our stats
-        if TextCleaner.has_emoji(original_text) or TextCleaner.has_emoji(raw_review.get('title', '')):
-            filtered_stats['emoji'] += 1
-            continue  # Skip to next review
-        
-        # Check if review has personal information (PII = Personally Identifiable Information)
-        # Like email addresses or phone numbers
-        # If it does, skip it for privacy reasons
-        if PIIDetector.has_pii(original_text) or PIIDetector.has_pii(raw_review.get('title', '')):
-            filtered_stats['pii'] += 1
-            continue  # Skip to next review
-        
-        # Process review (this checks if it's English and long enough)
-        # This function cleans the text and validates it
-        processed = ReviewValidator.process_review(raw_review)
-        if processed:
-            # Review passed all checks! Add it to our good reviews list
-            processed_reviews.append(processed)
-        else:
-            # Review failed - figure out why so we can report it
-            cleaned_text = TextCleaner.clean(original_text)
-            if len(cleaned_text.strip()) < 20:
-                filtered_stats['too_short'] += 1  # Too short
-            elif not LanguageDetector.is_english(cleaned_text):
-                filtered_stats['non_english'] += 1  # Not English
-            else:
-                filtered_stats['validation_error'] += 1  # Some other problem
+    # Count of reviews we rejected and why (keys are the reasons
+    # returned by _validate_one)
+    filtered_stats = Counter()
+    
+    # Go through each review and check it. The checks are pure CPU work and
+    # independent per review, so big batches are spread across all cores.
+    # Load language detection data once up front; forked workers share it
+    LanguageDetector.load_models()
+    if len(raw_reviews) >= _PARALLEL_MIN_REVIEWS:
+        with ProcessPoolExecutor(initializer=LanguageDetector.load_models) as executor:
+            results = list(executor.map(_validate_one, raw_reviews, chunksize=256))
+    else:
+        results = list(map(_validate_one, raw_reviews))
+    
+    # Tally why reviews were rejected; everything else passed all checks
+    filtered_stats.update(reason for processed, reason in results if not processed)
+    valid_count = len(results) - sum(filtered_stats.values())
+    
+    # The raw reviews are already saved, so let them be freed instead of
+    # keeping every stage of the pipeline in memory at once
+    del raw_reviews
     
     # Tell the user how many reviews passed and how many were rejected
-    logger.info(f"Processed {len(processed_reviews)} valid reviews")
-    if any(filtered_stats.values()):
+    logger.info(f"Processed {valid_count} valid reviews")
+    if filtered_stats:
         logger.info(f"Filtered out:")
-        if filtered_stats['emoji'] > 0:
-            logger.info(f"  - {filtered_stats['emoji']} reviews with emojis")
-        if filtered_stats['pii'] > 0:
-            logger.info(f"  - {filtered_stats['pii']} reviews with PII")
-        if filtered_stats['non_english'] > 0:
-            logger.info(f"  - {filtered_stats['non_english']} non-English reviews")
-        if filtered_stats['too_short'] > 0:
-            logger.info(f"  - {filtered_stats['too_short']} reviews with less than 20 characters")
-        if filtered_stats['validation_error'] > 0:
-            logger.info(f"  - {filtered_stats['validation_error']} reviews with validation errors")
+        for reason, label in _FILTER_LABELS:
+            if filtered_stats[reason] > 0:
+                logger.info(f"  - {filtered_stats[reason]} {label}")
     
     # ============================================================
     # STEP 4: Deduplicate
@@ -158,7 +161,9 @@ def import_reviews() -> List[Review]:
     # We find duplicates and keep only one copy
     logger.info("Step 4: Deduplicating reviews...")
     deduplicator = ReviewDeduplicator()
-    unique_reviews = deduplicator.filter_duplicates(processed_reviews)
+    # Stream the valid reviews straight in rather than collecting them first
+    unique_reviews = deduplicator.filter_duplicates(processed for processed, _ in results if processed)
+    del results
     logger.info(f"After deduplication: {len(unique_reviews)} unique reviews")
     
     # ============================================================
@@ -169,6 +174,7 @@ def import_reviews() -> List[Review]:
     # so the rest of the system knows how to use it
     logger.info("Step 5: Converting to Review objects...")
     review_objects = []
+    creation_errors = Counter()  # Exception type -> how many reviews it affected
     for review_dict in unique_reviews:
         try:
             # Create a Review object with all the review information
@@ -182,8 +188,13 @@ def import_reviews() -> List[Review]:
             review_objects.append(review)
         except Exception as e:
             # If something goes wrong creating the object, skip it and continue
-            logger.warning(f"Error creating Review object: {e}")
+            creation_errors[type(e).__name__] += 1
             continue
+    del unique_reviews
+    if creation_errors:
+        # Report once per error type instead of once per review
+        for error_type, count in creation_errors.items():
+            logger.warning(f"Error creating Review object: {error_type} for {count} reviews")
     
     # ============================================================
     # STEP 6: Store reviews
@@ -2,17 +2,30 @@
 Scraper for fetching reviews from Play Store
 Using google-play-scraper library
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import time
+import hashlib
+import random
+import re
 
 from google_play_scraper import reviews as play_reviews, Sort
 
 from config.settings import settings
 from utils.logger import get_logger
+from utils.rate_limiter import RateLimiter, retry_after_seconds
 
 logger = get_logger(__name__)
 
+# How many times to retry a page after the Play Store pushes back
+_PAGE_RETRY_ATTEMPTS = 3
+_RETRY_BACKOFF_BASE = 0.5  # Seconds; doubles on every retry, plus random jitter
+
+# Review date strings: ISO-style dates (parsed with fromisoformat) and the
+# written-out forms that need strptime
+_ISO_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}:\d{2})?')
+_TEXT_DATE_FORMATS = ("%d %b %Y", "%b %d, %Y")
+
 
 class PlayStoreScraper:
     """Scraper for Google Play Store reviews using google-play-scraper"""
@@ -20,6 +33,8 @@ class PlayStoreScraper:
     def __init__(self, app_id: str, app_url: str):
         self.app_id = app_id
         self.app_url = app_url
+        # Paces page requests: speeds up while they succeed, backs off when throttled
+        self.rate_limiter = RateLimiter(settings.PLAY_STORE_REQUESTS_PER_MINUTE)
     
     def fetch_reviews(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """
@@ -45,19 +60,18 @@ class PlayStoreScraper:
             total_processed = 0
             max_reviews = 2000  # Increased limit to ensure we can fetch reviews across the full date range
             reviews_before_start_date = 0  # Track how many reviews are before start_date
-            consecutive_out_of_range = 0  # Track consecutive reviews outside date range
+            
+            # Pages have to be requested in order (each needs the previous
+            # page's continuation token), but the next page can download
+            # while the current one is being processed
+            prefetcher = ThreadPoolExecutor(max_workers=1)
+            next_page = prefetcher.submit(self._fetch_page, continuation_token)
             
             while total_fetched < max_reviews:
                 try:
-                    # Fetch a batch of reviews
-                    result, continuation_token = play_reviews(
-                        self.app_id,
-                        lang='en',
-                        country='in',  # India
-                        sort=Sort.NEWEST,  # Sort by newest first
-                        count=100,  # Fetch 100 reviews per batch
-                        continuation_token=continuation_token
-                    )
+                    # Wait for the batch of reviews requested earlier
+                    result, continuation_token = next_page.result()
+                    next_page = None
                     
                     if not result:
                         break
@@ -65,45 +79,61 @@ class PlayStoreScraper:
                     batch_in_range = 0
                     batch_out_of_range = 0
                     
+                    # Parse the whole page's dates up front (google-play-scraper
+                    # returns them in the 'at' field); reviews without a date
+                    # count as yesterday
+                    fallback_date = datetime.now() - timedelta(days=1)
+                    page_dates = [self._parse_review_date(review.get('at', None)) or fallback_date for review in result]
+                    
+                    # Sorted by NEWEST, so once a page reaches past start_date the
+                    # following pages can only hold older reviews
+                    reached_start_date = min(page_dates) < start_date
+                    if reached_start_date:
+                        continuation_token = None
+                    
+                    # Request the following page straight away (once the rate
+                    # limiter allows it) instead of after processing this one
+                    if continuation_token:
+                        next_page = prefetcher.submit(self._fetch_page, continuation_token)
+                    
+                    # Pages newer than end_date (the excluded recent days) have
+                    # nothing to keep, so skip the per-review work for them
+                    if min(page_dates) > end_date:
+                        total_processed += len(result)
+                        logger.debug(f"Batch: 0 in range, {len(result)} out of range")
+                        if not continuation_token:
+                            break
+                        continue
+                    
                     # Process reviews
-                    for review in result:
+                    for review, review_date in zip(result, page_dates):
                         try:
                             total_processed += 1
                             
-                            # Parse review date (google-play-scraper returns timestamp in 'at' field)
-                            review_date = self._parse_review_date(review.get('at', None))
-                            
-                            if not review_date:
-                                review_date = datetime.now() - timedelta(days=1)
-                            
                             # Filter by date range
                             # If review is after end_date, skip it (too new)
                             if review_date > end_date:
                                 batch_out_of_range += 1
                                 continue
                             
-                            # If review is before start_date, we've gone too far back
-                            # Stop fetching since we're sorted by NEWEST and won't find older reviews
+                            # If review is before start_date, we've gone too far back.
+                            # Keep going through this page (in case of slightly
+                            # out-of-order reviews) but don't fetch another one
                             if review_date < start_date:
                                 reviews_before_start_date += 1
                                 batch_out_of_range += 1
-                                consecutive_out_of_range += 1
-                                # If we've seen many consecutive reviews before start_date, stop
-                                if consecutive_out_of_range >= 50:
-                                    logger.info(f"Stopping: Found {consecutive_out_of_range} consecutive reviews before start_date {start_date.date()}")
-                                    break
                                 continue
                             
-                            # Reset consecutive counter if we found a review in range
-                            consecutive_out_of_range = 0
-                            
                             # Extract review data
                             review_text = review.get('content', '')
                             if not review_text or len(review_text.strip()) < 10:
                                 continue
                             
+                            # Content-addressed ID: hash() is salted per process, so the
+                            # same review would get a new ID (and pass dedup) every run
                             user_text = f"{review.get('userName', '')}{review_text}"
-                            review_id = f"play_store_{self.app_id}_{abs(hash(user_text))}"
+                            user_hash = hashlib.blake2b(user_text.encode('utf-8'), digest_size=8).hexdigest()
+                            review_id = f"play_store_{self.app_id}_{user_hash}"
                             
                             reviews.append({
                                 "review_id": review_id,
@@ -125,22 +155,21 @@ class PlayStoreScraper:
                     if batch_in_range > 0 or batch_out_of_range > 0:
                         logger.debug(f"Batch: {batch_in_range} in range, {batch_out_of_range} out of range")
                     
-                    # If we've found many consecutive reviews before start_date, stop fetching
-                    if consecutive_out_of_range >= 50:
-                        logger.info(f"Stopping fetch: Found {consecutive_out_of_range} consecutive reviews before start_date")
+                    if reached_start_date:
+                        logger.info(f"Stopping fetch: reached reviews before start_date {start_date.date()}")
                         break
                     
                     # If no continuation token, we've fetched all reviews
                     if not continuation_token:
                         break
                     
-                    # Small delay to avoid rate limiting
-                    time.sleep(1)
-                    
                 except Exception as e:
                     logger.error(f"Error fetching Play Store review batch: {e}")
                     break
             
+            # Don't wait for a page we no longer need
+            prefetcher.shutdown(wait=False, cancel_futures=True)
+            
             logger.info(f"Successfully fetched {len(reviews)} Play Store reviews within date range")
             logger.info(f"Processed {total_processed} total reviews, {reviews_before_start_date} were before start_date")
             
@@ -160,6 +189,44 @@ class PlayStoreScraper:
         
         return reviews
     
+    def _fetch_page(self, continuation_token):
+        """
+        Fetch one batch of reviews, paced by the rate limiter
+        
+        google-play-scraper doesn't expose response headers; it raises once
+        the Play Store keeps rejecting requests (e.g. PlayGatewayError or an
+        HTTP 429), so a failed request is treated as being throttled.
+        
+        Args:
+            continuation_token: Token from the previous batch (None for the first)
+        
+        Returns:
+            Tuple of (reviews, continuation_token) as returned by google-play-scraper
+        """
+        for attempt in range(_PAGE_RETRY_ATTEMPTS):
+            self.rate_limiter.wait()
+            try:
+                page = play_reviews(
+                    self.app_id,
+                    lang='en',
+                    country='in',  # India
+                    sort=Sort.NEWEST,  # Sort by newest first
+                    count=100,  # Fetch 100 reviews per batch
+                    continuation_token=continuation_token
+                )
+            except Exception as e:
+                if attempt == _PAGE_RETRY_ATTEMPTS - 1:
+                    raise
+                # Exponential backoff with jitter, unless the store said how long to wait
+                backoff = retry_after_seconds(e)
+                if backoff is None:
+                    backoff = _RETRY_BACKOFF_BASE * 2 ** attempt + random.uniform(0, _RETRY_BACKOFF_BASE)
+                self.rate_limiter.record_throttled(retry_after=backoff)
+                logger.warning(f"Play Store request failed, retrying in {backoff:.1f}s: {e}")
+                continue
+            self.rate_limiter.record_success()
+            return page
+    
     def _parse_review_date(self, date_value) -> Optional[datetime]:
         """Parse review date from various formats"""
         if not date_value:
@@ -181,18 +248,20 @@ class PlayStoreScraper:
         
         # If it's a string, try to parse it
         if isinstance(date_value, str):
-            formats = [
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%dT%H:%M:%S",
-                "%Y-%m-%d",
-                "%d %b %Y",
-                "%b %d, %Y",
-            ]
+            date_value = date_value.strip()
             
-            for fmt in formats:
+            # YYYY-MM-DD with optional " HH:MM:SS" / "THH:MM:SS": one regex
+            # picks the format instead of trying strptime formats until one fits
+            if _ISO_DATE_PATTERN.fullmatch(date_value):
                 try:
-                    return datetime.strptime(date_value.strip(), fmt)
-                except:
+                    return datetime.fromisoformat(date_value)
+                except ValueError:  # Right shape, impossible date
+                    return None
+            
+            for fmt in _TEXT_DATE_FORMATS:
+                try:
+                    return datetime.strptime(date_value, fmt)
+                except ValueError:
                     continue
         
         return None
@@ -1,19 +1,33 @@
 """
 Storage module for saving reviews as week-level buckets
 """
-import json
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict
+from datetime import date as _date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from config.settings import settings
 from models.review import Review
-from layer_1_data_import.validator import ReviewValidator, TextCleaner, PIIDetector, LanguageDetector
+from layer_1_data_import.deduplicator import ReviewDeduplicator
+from layer_1_data_import.validator import (
+    ReviewValidator, TextCleaner, PIIDetector, LanguageDetector, VALIDATION_RULES_VERSION
+)
+from utils import json_utils
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Week files written at the same time by save_reviews
+_WEEK_WRITE_WORKERS = 4
+
+# Version of the processed week file format. Version 3 marks every review
+# that passed validation with "_validated": <VALIDATION_RULES_VERSION>, so
+# re-saves can skip validating it again; reviews without the marker (manual
+# edits) or with an older rules version are still validated. The true flag
+# written by version 2 counts as rules version 1.
+WEEK_FILE_SCHEMA_VERSION = 3
+
 
 class ReviewStorage:
     """Store reviews as week-level buckets"""
@@ -27,6 +41,13 @@ class ReviewStorage:
         """
         self.storage_dir = storage_dir or settings.REVIEWS_DIR
         os.makedirs(self.storage_dir, exist_ok=True)
+        # Week file name -> [mtime_ns, size] of files known to hold only valid
+        # reviews; loaded on first use, and dropped if it was written under
+        # other validation rules
+        self._validation_cache_file = os.path.join(self.storage_dir, ".validated_files.json")
+        self._validation_cache: Optional[Dict[str, List[int]]] = None
+        # (directory mtime_ns, week keys) from the last get_available_weeks() scan
+        self._weeks_cache: Optional[Tuple[int, List[str]]] = None
     
     def _get_week_key(self, date: datetime) -> str:
         """
@@ -38,10 +59,10 @@ class ReviewStorage:
         Returns:
             Week key string
         """
-        # Calculate Monday of the week
-        days_since_monday = date.weekday()
-        monday = date - timedelta(days=days_since_monday)
-        return monday.strftime("%Y-%m-%d")
+        # Monday of the week, on proleptic ordinals: day 1 (0001-01-01) was a
+        # Monday, so no timedelta/datetime has to be built along the way
+        ordinal = date.toordinal()
+        return _date.fromordinal(ordinal - (ordinal - 1) % 7).isoformat()
     
     def _get_filename(self, week_key: str) -> str:
         """Get filename for a week"""
@@ -54,106 +75,199 @@ class ReviewStorage:
         Args:
             reviews: List of Review objects
         """
-        # Group reviews by week
+        # Group reviews by week. Many reviews share a day, so the week key
+        # is worked out once per calendar day rather than once per review.
         weekly_reviews = defaultdict(list)
+        week_keys: Dict = {}
         
         for review in reviews:
-            week_key = self._get_week_key(review.date)
+            day = review.date.date()
+            week_key = week_keys.get(day)
+            if week_key is None:
+                week_key = week_keys[day] = self._get_week_key(day)
             weekly_reviews[week_key].append(review.to_dict())
         
-        # Save each week's reviews
-        for week_key, week_reviews in weekly_reviews.items():
-            filename = self._get_filename(week_key)
+        # Week files are independent, so they're merged and written in
+        # parallel (file I/O releases the GIL). Load the validation cache
+        # first so the workers share one copy.
+        self._load_validation_cache()
+        with ThreadPoolExecutor(max_workers=_WEEK_WRITE_WORKERS) as pool:
+            list(pool.map(self._save_week, weekly_reviews.keys(), weekly_reviews.values()))
+        
+        self._save_validation_cache()
+    
+    def _save_week(self, week_key: str, week_reviews: List[Dict]):
+        """
+        Merge new reviews into one week's file and write it
+        
+        Args:
+            week_key: Week key (YYYY-MM-DD of the Monday)
+            week_reviews: New reviews for that week (as dicts)
+        """
+        filename = self._get_filename(week_key)
+        
+        # Load existing reviews if file exists
+        existing_reviews = []
+        if os.path.exists(filename):
+            try:
+                existing_reviews = json_utils.load_file(filename).get('reviews', [])
+            except Exception as e:
+                logger.warning(f"Error loading existing reviews from {filename}: {e}")
+        
+        # Filter existing reviews to ensure they meet quality criteria
+        # (non-English, emojis, PII, < 20 chars). A file this class wrote
+        # and that hasn't changed since was already validated, so skip it.
+        if self._is_validated(filename):
+            valid_existing_reviews = existing_reviews
+        else:
+            valid_existing_reviews = self._iter_valid_reviews(existing_reviews)
+        
+        # Merge with new reviews in one pass, tracking IDs as we go
+        # (avoids duplicates, including repeats within the new batch)
+        all_reviews = []
+        seen_ids = set()
+        for r in valid_existing_reviews:
+            r['_validated'] = VALIDATION_RULES_VERSION
+            all_reviews.append(r)
+            seen_ids.add(r['review_id'])
+        kept_count = len(all_reviews)
+        filtered_count = len(existing_reviews) - kept_count
+        
+        new_count = 0
+        for r in week_reviews:
+            if r['review_id'] not in seen_ids:
+                seen_ids.add(r['review_id'])
+                r['_validated'] = VALIDATION_RULES_VERSION  # Validated during import
+                all_reviews.append(r)
+                new_count += 1
+        
+        # Only save if there are reviews (new or filtered existing)
+        if all_reviews:
             
-            # Load existing reviews if file exists
-            existing_reviews = []
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                        existing_reviews = existing_data.get('reviews', [])
-                except Exception as e:
-                    logger.warning(f"Error loading existing reviews from {filename}: {e}")
+            # Save to file
+            week_data = {
+                'schema_version': WEEK_FILE_SCHEMA_VERSION,
+                'week_start_date': week_key,
+                'week_end_date': (datetime.strptime(week_key, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d"),
+                'total_reviews': len(all_reviews),
+                'reviews': all_reviews
+            }
             
-            # Filter existing reviews to ensure they meet quality criteria
-            # (non-English, emojis, PII, < 20 chars)
-            filtered_existing_reviews = []
-            filtered_count = 0
-            for r in existing_reviews:
-                # Parse date if it's a string
-                review_date = r.get('date')
-                if isinstance(review_date, str):
-                    try:
-                        # Try ISO format first (with T separator)
-                        if 'T' in review_date:
-                            review_date = datetime.fromisoformat(review_date.replace('Z', '+00:00'))
-                        else:
-                            # Try space-separated format (YYYY-MM-DD HH:MM:SS)
-                            try:
-                                review_date = datetime.strptime(review_date, "%Y-%m-%d %H:%M:%S")
-                            except:
-                                # Try date-only format
-                                review_date = datetime.strptime(review_date, "%Y-%m-%d")
-                    except Exception as e:
-                        logger.warning(f"Could not parse date for review {r.get('review_id')}: {review_date} - {e}")
-                        continue
-                elif not isinstance(review_date, datetime):
-                    logger.warning(f"Invalid date type for review {r.get('review_id')}: {type(review_date)}")
-                    continue
-                
-                # Convert to dict format for validation
-                review_dict = {
-                    'review_id': r.get('review_id'),
-                    'title': r.get('title', ''),
-                    'text': r.get('text', ''),
-                    'date': review_date,
-                    'platform': r.get('platform')
-                }
+            try:
+                json_utils.dump_file(week_data, filename, indent=settings.PRETTY_JSON)
+                # Everything just written has passed validation
+                self._mark_validated(filename)
                 
-                # Validate and filter existing review
-                processed = ReviewValidator.process_review(review_dict)
-                if processed:
-                    # Keep only required fields
-                    filtered_review = {
-                        'review_id': processed.get('review_id'),
-                        'text': processed.get('text'),
-                        'date': processed.get('date'),
-                        'platform': processed.get('platform')
-                    }
-                    filtered_existing_reviews.append(filtered_review)
-                else:
-                    filtered_count += 1
+                if filtered_count > 0:
+                    logger.info(f"Filtered out {filtered_count} invalid existing reviews from {filename} (kept {kept_count} out of {len(existing_reviews)})")
+                if new_count:
+                    logger.info(f"Saved {new_count} new reviews to {filename} (total: {len(all_reviews)})")
+                elif filtered_count > 0:
+                    logger.info(f"Updated {filename} with filtered reviews (total: {len(all_reviews)})")
+            except Exception as e:
+                logger.error(f"Error saving reviews to {filename}: {e}")
+    
+    def _iter_valid_reviews(self, existing_reviews: List[Dict]) -> Iterator[Dict]:
+        """
+        Re-validate reviews loaded from a week file
+        
+        Args:
+            existing_reviews: Reviews as stored in the week file
+        
+        Yields:
+            Reviews that still pass validation (required fields only)
+        """
+        for r in existing_reviews:
+            # Written by save_reviews after passing the current rules
+            if r.get('_validated') == VALIDATION_RULES_VERSION:
+                yield r
+                continue
             
-            # Merge with new reviews (avoid duplicates)
-            existing_ids = {r['review_id'] for r in filtered_existing_reviews}
-            new_reviews = [r for r in week_reviews if r['review_id'] not in existing_ids]
+            # Parse date if it's a string
+            review_date = r.get('date')
+            if isinstance(review_date, str):
+                try:
+                    # Try ISO format first (with T separator)
+                    if 'T' in review_date:
+                        review_date = datetime.fromisoformat(review_date.replace('Z', '+00:00'))
+                    else:
+                        # Try space-separated format (YYYY-MM-DD HH:MM:SS)
+                        try:
+                            review_date = datetime.strptime(review_date, "%Y-%m-%d %H:%M:%S")
+                        except:
+                            # Try date-only format
+                            review_date = datetime.strptime(review_date, "%Y-%m-%d")
+                except Exception as e:
+                    logger.warning(f"Could not parse date for review {r.get('review_id')}: {review_date} - {e}")
+                    continue
+            elif not isinstance(review_date, datetime):
+                logger.warning(f"Invalid date type for review {r.get('review_id')}: {type(review_date)}")
+                continue
             
-            # Combine filtered existing reviews with new reviews
-            all_reviews = filtered_existing_reviews + new_reviews
+            # Convert to dict format for validation
+            review_dict = {
+                'review_id': r.get('review_id'),
+                'title': r.get('title', ''),
+                'text': r.get('text', ''),
+                'date': review_date,
+                'platform': r.get('platform')
+            }
             
-            # Only save if there are reviews (new or filtered existing)
-            if all_reviews:
-                
-                # Save to file
-                week_data = {
-                    'week_start_date': week_key,
-                    'week_end_date': (datetime.strptime(week_key, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d"),
-                    'total_reviews': len(all_reviews),
-                    'reviews': all_reviews
+            # Validate and filter existing review
+            processed = ReviewValidator.process_review(review_dict)
+            if processed:
+                # Keep only required fields
+                yield {
+                    'review_id': processed.get('review_id'),
+                    'text': processed.get('text'),
+                    'date': processed.get('date'),
+                    'platform': processed.get('platform')
                 }
-                
+    
+    @staticmethod
+    def _file_signature(filename: str) -> Optional[List[int]]:
+        """Modification time and size of a file (None if it doesn't exist)"""
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _load_validation_cache(self) -> Dict[str, List[int]]:
+        """Load the signatures of week files whose reviews are known to be valid"""
+        if self._validation_cache is None:
+            self._validation_cache = {}
+            if os.path.exists(self._validation_cache_file):
                 try:
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(week_data, f, indent=2, ensure_ascii=False, default=str)
-                    
-                    if filtered_count > 0:
-                        logger.info(f"Filtered out {filtered_count} invalid existing reviews from {filename} (kept {len(filtered_existing_reviews)} out of {len(existing_reviews)})")
-                    if new_reviews:
-                        logger.info(f"Saved {len(new_reviews)} new reviews to {filename} (total: {len(all_reviews)})")
-                    elif filtered_count > 0:
-                        logger.info(f"Updated {filename} with filtered reviews (total: {len(all_reviews)})")
+                    cached = json_utils.load_file(self._validation_cache_file)
+                    if cached.get('rules_version') == VALIDATION_RULES_VERSION:
+                        self._validation_cache = cached.get('files', {})
+                    else:
+                        logger.info("Validation rules changed since the last run, re-validating week files")
                 except Exception as e:
-                    logger.error(f"Error saving reviews to {filename}: {e}")
+                    logger.warning(f"Error loading validation cache, re-validating week files: {e}")
+        return self._validation_cache
+    
+    def _is_validated(self, filename: str) -> bool:
+        """Check if a week file is unchanged since it was last written with valid reviews"""
+        signature = self._file_signature(filename)
+        return signature is not None and self._load_validation_cache().get(os.path.basename(filename)) == signature
+    
+    def _mark_validated(self, filename: str):
+        """Remember that a week file (as it is now) only holds valid reviews"""
+        self._load_validation_cache()[os.path.basename(filename)] = self._file_signature(filename)
+    
+    def _save_validation_cache(self):
+        """Persist the validation cache"""
+        if self._validation_cache is None:
+            return
+        try:
+            json_utils.dump_file(
+                {'rules_version': VALIDATION_RULES_VERSION, 'files': self._validation_cache},
+                self._validation_cache_file
+            )
+        except Exception as e:
+            logger.warning(f"Error saving validation cache: {e}")
     
     def load_week_reviews(self, week_key: str) -> List[Dict]:
         """
@@ -163,7 +277,7 @@ class ReviewStorage:
             week_key: Week key (YYYY-MM-DD format)
         
         Returns:
-            List of review dictionaries
+            List of review dictionaries (without the storage-only "_validated" marker)
         """
         filename = self._get_filename(week_key)
         
@@ -171,22 +285,35 @@ class ReviewStorage:
             return []
         
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('reviews', [])
+            reviews = json_utils.load_file(filename).get('reviews', [])
+            for r in reviews:
+                r.pop('_validated', None)
+            return reviews
         except Exception as e:
             logger.error(f"Error loading reviews from {filename}: {e}")
             return []
     
     def get_available_weeks(self) -> List[str]:
         """Get list of available week keys"""
-        weeks = []
-        if os.path.exists(self.storage_dir):
-            for filename in os.listdir(self.storage_dir):
-                if filename.startswith('reviews_') and filename.endswith('.json'):
-                    week_key = filename.replace('reviews_', '').replace('.json', '')
-                    weeks.append(week_key)
-        return sorted(weeks)
+        try:
+            dir_mtime = os.stat(self.storage_dir).st_mtime_ns
+        except OSError:
+            return []
+        
+        # Adding or removing a week file changes the directory's mtime, so the
+        # listing only needs to be redone when that changes
+        if self._weeks_cache is not None and self._weeks_cache[0] == dir_mtime:
+            return list(self._weeks_cache[1])
+        
+        prefix, suffix = 'reviews_', '.json'
+        with os.scandir(self.storage_dir) as entries:
+            weeks = sorted(
+                entry.name[len(prefix):-len(suffix)]
+                for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith(suffix)
+            )
+        self._weeks_cache = (dir_mtime, weeks)
+        return list(weeks)
     
     def save_raw_reviews(self, raw_reviews: List[Dict], import_timestamp: datetime = None):
         """
@@ -207,11 +334,22 @@ class ReviewStorage:
         if import_timestamp is None:
             import_timestamp = datetime.now()
         
+        # IDs of every review already in a raw file. Reviews found here are
+        # dropped up front, so weeks with nothing new are never loaded or
+        # rewritten. (Delete the index along with any raw file removed by hand.)
+        id_index = ReviewDeduplicator(cache_file=os.path.join(raw_storage_dir, ".raw_review_ids.bin"))
+        
         # Group reviews by week
         weekly_reviews = defaultdict(list)
+        already_saved = 0
         
         for review in raw_reviews:
             try:
+                review_id = review.get('review_id')
+                if review_id and id_index.is_duplicate(review_id):
+                    already_saved += 1
+                    continue
+                
                 # Extract date from review
                 review_date = review.get('date')
                 if isinstance(review_date, str):
@@ -229,6 +367,9 @@ class ReviewStorage:
                 logger.warning(f"Error processing raw review for storage: {e}")
                 continue
         
+        if already_saved:
+            logger.info(f"Skipped {already_saved} raw reviews already saved by an earlier import")
+        
         # Save each week's raw reviews
         for week_key, week_reviews in weekly_reviews.items():
             filename = os.path.join(raw_storage_dir, f"raw_reviews_{week_key}.json")
@@ -237,15 +378,18 @@ class ReviewStorage:
             existing_reviews = []
             if os.path.exists(filename):
                 try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                        existing_reviews = existing_data.get('reviews', [])
+                    existing_reviews = json_utils.load_file(filename).get('reviews', [])
                 except Exception as e:
                     logger.warning(f"Error loading existing raw reviews from {filename}: {e}")
             
             # Merge with existing reviews (avoid duplicates by review_id)
-            existing_ids = {r.get('review_id') for r in existing_reviews if r.get('review_id')}
-            new_reviews = [r for r in week_reviews if r.get('review_id') not in existing_ids]
+            seen_ids = {r.get('review_id') for r in existing_reviews if r.get('review_id')}
+            new_reviews = []
+            for r in week_reviews:
+                review_id = r.get('review_id')
+                if review_id not in seen_ids:
+                    seen_ids.add(review_id)
+                    new_reviews.append(r)
             
             if new_reviews:
                 all_reviews = existing_reviews + new_reviews
@@ -260,9 +404,18 @@ class ReviewStorage:
                 }
                 
                 try:
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(week_data, f, indent=2, ensure_ascii=False, default=str)
+                    # Raw files are only read back by code, so write compact JSON
+                    json_utils.dump_file(week_data, filename)
                     logger.info(f"Saved {len(new_reviews)} raw reviews to {filename} (total: {len(all_reviews)})")
                 except Exception as e:
                     logger.error(f"Error saving raw reviews to {filename}: {e}")
+                    continue
+            
+            # Index everything now in the file, including reviews saved before
+            # the index existed
+            for review_id in seen_ids:
+                if review_id:
+                    id_index.mark_as_processed(review_id)
+        
+        id_index.save()
 
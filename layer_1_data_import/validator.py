@@ -1,19 +1,35 @@
 """
 Schema validator and PII detector for reviews
 """
+import functools
+import os
 import re
-from typing import Dict, Optional
+from collections import Counter, namedtuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 # Language detection
 try:
     from langdetect import detect_langs, LangDetectException
+    from langdetect.detector_factory import init_factory as _load_langdetect_profiles
     LANGDETECT_AVAILABLE = True
 except ImportError:
     LANGDETECT_AVAILABLE = False
+    
+    class LangDetectException(Exception):
+        """Placeholder so the except clauses below still work without langdetect"""
+    
     logger_temp = __import__('logging').getLogger(__name__)
     logger_temp.warning("langdetect not available. Language detection will be disabled.")
 
+# Fast language identification (fastText lid.176 model, C++ backend).
+# Used instead of langdetect when installed and the model file is present.
+try:
+    import fasttext
+    FASTTEXT_AVAILABLE = True
+except ImportError:
+    FASTTEXT_AVAILABLE = False
+
 # Emoji detection
 try:
     import emoji
@@ -23,10 +39,37 @@ except ImportError:
     logger_temp = __import__('logging').getLogger(__name__)
     logger_temp.warning("emoji library not available. Using regex-based emoji detection.")
 
+from config.settings import settings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Same shape as langdetect's Language result (.lang, .prob)
+DetectedLanguage = namedtuple('DetectedLanguage', ['lang', 'prob'])
+
+# Distinct review texts whose is_english() result is kept
+_LANGUAGE_CACHE_SIZE = 50000
+
+# Joins title and text for the emoji/PII checks (not \w, not \s, so \b and
+# \s-based patterns can't run from one field into the other)
+FIELD_SEPARATOR = '\x00'
+
+# Version of the filtering rules below (language, emoji, PII, length). Bump
+# it whenever they change, so reviews stored under older rules are checked
+# again.
+VALIDATION_RULES_VERSION = 1
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent (first, last) ranges"""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
 
 class PIIDetector:
     """Detect and redact PII from review text"""
@@ -53,6 +96,18 @@ class PIIDetector:
     # Username/handle patterns
     USERNAME_PATTERN = re.compile(r'@\w+')
     
+    # All of the above combined for has_pii(); each alternative keeps its
+    # own flags via an inline (?i:...) group where needed
+    ANY_PII_PATTERN = re.compile('|'.join(
+        f'(?i:{pattern.pattern})' if pattern.flags & re.IGNORECASE else f'(?:{pattern.pattern})'
+        for pattern in [EMAIL_PATTERN, *PHONE_PATTERNS, ACCOUNT_ID_PATTERN, USERNAME_PATTERN]
+    ))
+    
+    # Every PII pattern needs a digit or an '@'. Most reviews have neither,
+    # and a single-character-class search rules them out far faster than
+    # trying each alternative of ANY_PII_PATTERN at every position.
+    PII_CANDIDATE_PATTERN = re.compile(r'[\d@]')
+    
     @classmethod
     def detect_and_redact(cls, text: str) -> str:
         """
@@ -90,45 +145,51 @@ class PIIDetector:
         if not text:
             return False
         
-        # Check for any PII patterns
-        if cls.EMAIL_PATTERN.search(text):
-            return True
-        
-        for pattern in cls.PHONE_PATTERNS:
-            if pattern.search(text):
-                return True
-        
-        if cls.ACCOUNT_ID_PATTERN.search(text):
-            return True
-        
-        if cls.USERNAME_PATTERN.search(text):
-            return True
+        if not cls.PII_CANDIDATE_PATTERN.search(text):
+            return False
         
-        return False
+        # One scan with every PII pattern as an alternative, instead of a
+        # separate search per pattern
+        return cls.ANY_PII_PATTERN.search(text) is not None
 
 
 class TextCleaner:
     """Clean review text before processing"""
     
-    # Emoji pattern for detection (before removal) - comprehensive Unicode ranges
+    # Emoji code point ranges (first, last) - comprehensive Unicode ranges
+    EMOJI_RANGES = [
+        (0x1F600, 0x1F64F),  # emoticons
+        (0x1F300, 0x1F5FF),  # symbols & pictographs
+        (0x1F680, 0x1F6FF),  # transport & map symbols
+        (0x1F700, 0x1F77F),  # alchemical symbols
+        (0x1F780, 0x1F7FF),  # Geometric Shapes Extended
+        (0x1F800, 0x1F8FF),  # Supplemental Arrows-C
+        (0x1F900, 0x1F9FF),  # Supplemental Symbols and Pictographs (includes 🥰)
+        (0x1FA00, 0x1FA6F),  # Chess Symbols
+        (0x1FA70, 0x1FAFF),  # Symbols and Pictographs Extended-A
+        (0x1F1E0, 0x1F1FF),  # flags
+        (0x2702, 0x27B0),  # Dingbats
+        (0x24C2, 0x1F251),
+        (0x2600, 0x26FF),  # Miscellaneous Symbols
+        (0x2700, 0x27BF),  # Dingbats
+    ]
+    
+    # Emoji pattern for detection (before removal). Most of the ranges above
+    # overlap or touch; merged, they are 3 ranges, and the regex engine tests
+    # every range for every character it scans.
     EMOJI_PATTERN = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F700-\U0001F77F"  # alchemical symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs (includes 🥰)
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U0001F1E0-\U0001F1FF"  # flags
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251"
-        "\U00002600-\U000026FF"  # Miscellaneous Symbols
-        "\U00002700-\U000027BF"  # Dingbats
-        "]+", flags=re.UNICODE
+        "[" + "".join(f"{chr(first)}-{chr(last)}" for first, last in _merge_ranges(EMOJI_RANGES)) + "]+",
+        flags=re.UNICODE
+    )
+    
+    # Patterns used by clean(), compiled once rather than on every call
+    HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+    URL_PATTERN = re.compile(
+        r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
     )
+    REFERRAL_PATTERN = re.compile(r'\b(?:ref|code|promo)[\s:]*\w+\b', re.IGNORECASE)  # App-specific referral codes
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+    EXCESS_PUNCTUATION_PATTERN = re.compile(r'([!?.]){3,}')
     
     @classmethod
     def has_emoji(cls, text: str) -> bool:
@@ -138,37 +199,19 @@ class TextCleaner:
         if not text:
             return False
         
+        # Every emoji is outside ASCII; most English reviews are pure ASCII,
+        # and str.isascii() answers that without scanning character by character
+        if text.isascii():
+            return False
+        
         # Method 1: Use emoji library if available (most reliable)
         if EMOJI_LIB_AVAILABLE:
             return emoji.emoji_count(text) > 0
         
-        # Method 2: Try regex pattern
-        if cls.EMOJI_PATTERN.search(text):
-            return True
-        
-        # Method 3: Check character-by-character for emoji Unicode ranges
-        # This is more reliable for edge cases
-        for char in text:
-            code_point = ord(char)
-            # Check various emoji ranges
-            if (
-                (0x1F600 <= code_point <= 0x1F64F) or  # emoticons
-                (0x1F300 <= code_point <= 0x1F5FF) or  # symbols & pictographs
-                (0x1F680 <= code_point <= 0x1F6FF) or  # transport & map symbols
-                (0x1F700 <= code_point <= 0x1F77F) or  # alchemical symbols
-                (0x1F780 <= code_point <= 0x1F7FF) or  # Geometric Shapes Extended
-                (0x1F800 <= code_point <= 0x1F8FF) or  # Supplemental Arrows-C
-                (0x1F900 <= code_point <= 0x1F9FF) or  # Supplemental Symbols and Pictographs
-                (0x1FA00 <= code_point <= 0x1FA6F) or  # Chess Symbols
-                (0x1FA70 <= code_point <= 0x1FAFF) or  # Symbols and Pictographs Extended-A
-                (0x1F1E0 <= code_point <= 0x1F1FF) or  # flags
-                (0x2702 <= code_point <= 0x27B0) or   # Dingbats
-                (0x2600 <= code_point <= 0x26FF) or   # Miscellaneous Symbols
-                (0x2700 <= code_point <= 0x27BF)      # Dingbats
-            ):
-                return True
-        
-        return False
+        # Method 2: Regex pattern. Its character class already spans every
+        # emoji block (emoticons, pictographs, dingbats, flags, ...), so a
+        # per-character range check after it could never find anything more.
+        return cls.EMOJI_PATTERN.search(text) is not None
     
     @staticmethod
     def clean(text: str) -> str:
@@ -185,27 +228,26 @@ class TextCleaner:
         
         cleaned = text
         
-        # Remove HTML tags
-        cleaned = re.sub(r'<[^>]+>', '', cleaned)
-        
-        # Remove URLs
-        url_pattern = re.compile(
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        )
-        cleaned = url_pattern.sub('', cleaned)
+        # Remove HTML tags and URLs. Both need a literal ('<' / '://') that a
+        # substring check finds much faster than a regex scan, and most
+        # reviews contain neither.
+        if '<' in cleaned:
+            cleaned = TextCleaner.HTML_TAG_PATTERN.sub('', cleaned)
+        if '://' in cleaned:
+            cleaned = TextCleaner.URL_PATTERN.sub('', cleaned)
         
         # Remove app-specific referral codes
-        referral_pattern = re.compile(r'\b(?:ref|code|promo)[\s:]*\w+\b', re.IGNORECASE)
-        cleaned = referral_pattern.sub('', cleaned)
+        cleaned = TextCleaner.REFERRAL_PATTERN.sub('', cleaned)
         
-        # Remove emojis
-        cleaned = TextCleaner.EMOJI_PATTERN.sub('', cleaned)
+        # Remove emojis (ASCII text can't contain any, so skip the scan)
+        if not cleaned.isascii():
+            cleaned = TextCleaner.EMOJI_PATTERN.sub('', cleaned)
         
         # Normalize whitespace
-        cleaned = re.sub(r'\s+', ' ', cleaned)
+        cleaned = TextCleaner.WHITESPACE_PATTERN.sub(' ', cleaned)
         
         # Remove excessive punctuation (more than 3 consecutive)
-        cleaned = re.sub(r'([!?.]){3,}', r'\1\1', cleaned)
+        cleaned = TextCleaner.EXCESS_PUNCTUATION_PATTERN.sub(r'\1\1', cleaned)
         
         # Strip quotes and normalize
         cleaned = cleaned.strip().strip('"').strip("'")
@@ -222,11 +264,35 @@ class LanguageDetector:
     # Languages to filter out (transliterated content)
     NON_ENGLISH_LANGUAGES = {'hi', 'mr', 'gu', 'ta', 'te', 'kn', 'ml', 'pa', 'bn', 'or', 'as'}
     
+    # Common Hindi transliteration words (more comprehensive), used by
+    # _simple_english_check(). Words on several lists count once per list.
+    HINDI_WORD_WEIGHTS = Counter(word for words in [
+        # Common Hindi words
+        'nahin|nahi|nhi|kyun|kya|kaise|kab|kahan|kis|kisi|ko|se|mein|par|aur|ya|lekin|magar|agar|toh|to|bhi|hain|hai|ho|hoga|hogi|honge|tha|thi|the|raha|rahi|rahe|gaya|gayi|gaye|kar|ki|ke|ka',
+        # Common Hindi adjectives/adverbs
+        'achha|accha|bahut|zyada|kam|sabse|sab|har|kuch|kuchh|bilkul|thoda|thodi|thode|bahar|andar|upar|neeche|aage|peeche|idhar|udhar|yahan|wahan',
+        # Common Hindi verbs
+        'karo|kare|karte|karti|karne|kar|kiya|kiye|kiya|diya|diye|di|liya|liye|li|gaya|gaye|gayi|aaya|aaye|aayi|gaya|gaye|gayi|hoga|hogi|honge|hoga|hogi|honge',
+        # Common Hindi phrases/expressions
+        'matlab|yaani|kyunki|isliye|tabhi|abhi|pehle|baad|mein|ke|liye|se|tak|bina',
+    ] for word in set(words.split('|')))
+    
+    # Whole words, as delimited by \b
+    WORD_PATTERN = re.compile(r'\w+')
+    
+    # fastText model, loaded on first use by _get_fasttext_model()
+    _fasttext_model = None
+    _fasttext_load_attempted = False
+    
     @classmethod
+    @functools.lru_cache(maxsize=_LANGUAGE_CACHE_SIZE)
     def is_english(cls, text: str) -> bool:
         """
         Check if text is semantically in English
         
+        Results are cached per text: short reviews ("Good app", "Nice") and
+        spam repeat a lot, and language detection is the slowest check.
+        
         Args:
             text: Text to check
         
@@ -241,8 +307,8 @@ class LanguageDetector:
         if not cls._simple_english_check(text):
             return False
         
-        if not LANGDETECT_AVAILABLE:
-            # If langdetect is not available, use simple heuristic result
+        if not LANGDETECT_AVAILABLE and cls._get_fasttext_model() is None:
+            # If no language detector is available, use simple heuristic result
             return True  # Already passed simple check above
         
         try:
@@ -254,7 +320,7 @@ class LanguageDetector:
                 return True  # Allow short texts through
             
             # Detect language with confidence scores
-            languages = detect_langs(cleaned_text)
+            languages = cls._detect_languages(cleaned_text)
             
             if not languages:
                 return True  # If detection fails, allow through (already passed simple check)
@@ -291,6 +357,55 @@ class LanguageDetector:
             logger.warning(f"Error in language detection: {e}")
             return True  # Default to allowing through if already passed simple check
     
+    @classmethod
+    def _get_fasttext_model(cls):
+        """
+        Load the fastText language ID model once (None if unavailable)
+        
+        The model file (lid.176.ftz) is not shipped with the repo; download it
+        to settings.FASTTEXT_LID_MODEL to enable it.
+        """
+        if cls._fasttext_model is None and not cls._fasttext_load_attempted:
+            cls._fasttext_load_attempted = True
+            if FASTTEXT_AVAILABLE and os.path.exists(settings.FASTTEXT_LID_MODEL):
+                try:
+                    cls._fasttext_model = fasttext.load_model(settings.FASTTEXT_LID_MODEL)
+                except Exception as e:
+                    logger.warning(f"Could not load fastText model, using langdetect: {e}")
+        return cls._fasttext_model
+    
+    @classmethod
+    def load_models(cls):
+        """
+        Load the language detection model ahead of the first review
+        
+        Loads the fastText model, or langdetect's language profiles (about
+        55 files, read once per process). Call this before starting worker
+        processes so forked workers inherit the loaded data instead of each
+        loading it again; it's also safe as a pool initializer.
+        """
+        if cls._get_fasttext_model() is None and LANGDETECT_AVAILABLE:
+            _load_langdetect_profiles()
+    
+    @classmethod
+    def _detect_languages(cls, text: str) -> List[DetectedLanguage]:
+        """
+        Detect the most likely languages of text, best first
+        
+        Uses fastText when its model is available (10-50x faster than
+        langdetect), otherwise langdetect.
+        """
+        model = cls._get_fasttext_model()
+        if model is None:
+            return detect_langs(text)
+        
+        # fastText predicts one line at a time
+        labels, probs = model.predict(text.replace('\n', ' '), k=2)
+        return [
+            DetectedLanguage(label.replace('__label__', ''), float(prob))
+            for label, prob in zip(labels, probs)
+        ]
+    
     @classmethod
     def _simple_english_check(cls, text: str) -> bool:
         """
@@ -307,23 +422,12 @@ class LanguageDetector:
         
         text_lower = text.lower()
         
-        # Common Hindi transliteration patterns (more comprehensive)
-        hindi_patterns = [
-            # Common Hindi words
-            r'\b(?:nahin|nahi|nhi|kyun|kya|kaise|kab|kahan|kis|kisi|ko|se|mein|par|aur|ya|lekin|magar|agar|toh|to|bhi|hain|hai|ho|hoga|hogi|honge|tha|thi|the|raha|rahi|rahe|gaya|gayi|gaye|kar|ki|ke|ka)\b',
-            # Common Hindi adjectives/adverbs
-            r'\b(?:achha|accha|bahut|zyada|kam|sabse|sab|har|kuch|kuchh|bilkul|thoda|thodi|thode|bahar|andar|upar|neeche|aage|peeche|idhar|udhar|yahan|wahan)\b',
-            # Common Hindi verbs
-            r'\b(?:karo|kare|karte|karti|karne|kar|kiya|kiye|kiya|diya|diye|di|liya|liye|li|gaya|gaye|gayi|aaya|aaye|aayi|gaya|gaye|gayi|hoga|hogi|honge|hoga|hogi|honge)\b',
-            # Common Hindi phrases/expressions
-            r'\b(?:matlab|yaani|kyunki|isliye|tabhi|abhi|pehle|baad|mein|ke|liye|se|tak|bina)\b',
-        ]
-        
         hindi_word_count = 0
         
-        for pattern in hindi_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            hindi_word_count += len(matches)
+        # One pass over the words with dict lookups, rather than a regex
+        # alternation scan per word list
+        for word in cls.WORD_PATTERN.findall(text_lower):
+            hindi_word_count += cls.HINDI_WORD_WEIGHTS.get(word, 0)
         
         # Calculate word density
         words = text_lower.split()
@@ -352,6 +456,9 @@ class ReviewValidator:
     
     REQUIRED_FIELDS = ['review_id', 'title', 'text', 'date', 'platform']
     
+    # Shortest review text (after cleaning) worth keeping
+    MIN_TEXT_LENGTH = 20
+    
     @classmethod
     def validate(cls, review_data: Dict) -> tuple[bool, Optional[str]]:
         """
@@ -410,43 +517,72 @@ class ReviewValidator:
         Returns:
             Processed review dictionary, or None if review should be filtered out
         """
+        processed_review, _ = cls.check_review(review_data)
+        return processed_review
+    
+    @classmethod
+    def check_review(cls, review_data: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Run every filter of process_review() once and report which one failed
+        
+        Each check (emoji, PII, cleaning, language) runs a single time per
+        review, so callers that need the rejection reason don't have to
+        repeat the work.
+        
+        Args:
+            review_data: Raw review dictionary
+        
+        Returns:
+            (processed_review, None) if the review passed, or (None, reason)
+            where reason is 'emoji', 'pii', 'too_short', 'non_english' or
+            'validation_error'
+        """
         original_text = review_data.get('text', '')
         original_title = review_data.get('title', '')
         review_id = review_data.get('review_id', 'unknown')
         
+        # Cleaning only ever removes characters, so text that is too short
+        # before cleaning will be too short after it: reject it before
+        # running any of the scans below
+        if len(original_text or '') < cls.MIN_TEXT_LENGTH:
+            logger.debug(f"Review filtered out (less than {cls.MIN_TEXT_LENGTH} characters): {review_id} - {original_text}")
+            return None, 'too_short'
+        
+        # Check title and text together in one pass instead of two
+        combined = (original_title or '') + FIELD_SEPARATOR + (original_text or '')
+        
         # Filter 1: Check for emojis in original text (reject if found)
-        if TextCleaner.has_emoji(original_text) or TextCleaner.has_emoji(original_title):
-            logger.debug(f"Review filtered out (contains emojis): {review_id} - {original_text[:50]}...")
-            return None
+        if TextCleaner.has_emoji(combined):
+            logger.debug(f"Review filtered out (contains emojis): {review_id} - {combined[:50]}...")
+            return None, 'emoji'
         
         # Filter 2: Check for PII in original text (reject if found)
-        if PIIDetector.has_pii(original_text) or PIIDetector.has_pii(original_title):
-            logger.debug(f"Review filtered out (contains PII): {review_id} - {original_text[:50]}...")
-            return None
+        if PIIDetector.has_pii(combined):
+            logger.debug(f"Review filtered out (contains PII): {review_id} - {combined[:50]}...")
+            return None, 'pii'
         
         # Clean text
         cleaned_text = TextCleaner.clean(original_text)
-        cleaned_title = TextCleaner.clean(original_title)
         
         # Filter 3: Check length after cleaning (must be >= 20 characters)
-        if len(cleaned_text.strip()) < 20:
+        if len(cleaned_text.strip()) < cls.MIN_TEXT_LENGTH:
             logger.debug(f"Review filtered out (less than 20 characters after cleaning): {review_id} - {cleaned_text[:50]}...")
-            return None
+            return None, 'too_short'
         
         # Filter 4: Check if text is semantically English (filter out transliterated Hindi/other languages)
         if not LanguageDetector.is_english(cleaned_text):
             logger.debug(f"Review filtered out (not semantically English): {review_id} - {cleaned_text[:50]}...")
-            return None
+            return None, 'non_english'
         
         # Update review data (text is already cleaned, no PII to redact since we filtered it out)
         processed_review = review_data.copy()
         processed_review['text'] = cleaned_text
-        processed_review['title'] = cleaned_title
+        processed_review['title'] = TextCleaner.clean(original_title)
         
         # Validate
         is_valid, error = cls.validate(processed_review)
         if not is_valid:
             logger.warning(f"Review validation failed: {error}. Review ID: {review_id}")
-            return None
+            return None, 'validation_error'
         
-        return processed_review
+        return processed_review, None
@@ -13,6 +13,7 @@ from .theme_config import (
 from .classifier import (
     ReviewClassifier,
     aggregate_theme_counts,
+    get_top_themes,
     get_top_themes_by_count
 )
 from .weekly_processor import WeeklyThemeProcessor
@@ -28,6 +29,7 @@ __all__ = [
     'MIN_REVIEW_LENGTH',
     'ReviewClassifier',
     'aggregate_theme_counts',
+    'get_top_themes',
     'get_top_themes_by_count',
     'WeeklyThemeProcessor',
     'classify_all_reviews',
@@ -1,13 +1,21 @@
 """
 LLM-based review classifier that assigns each review to one of 5 themes
 """
-import json
+import hashlib
+import os
+import random
 import re
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from collections import Counter
 
+from utils import json_utils
+from utils.llm_cache import SQLiteCache
 from utils.llm_client import LLMClient
+from utils.rate_limiter import RateLimiter, retry_after_seconds
+from layer_2_theme_extraction.fast_rules import match_fast_rule
 from layer_2_theme_extraction.theme_config import (
     THEMES,
     get_theme_list,
@@ -24,26 +32,96 @@ logger = get_logger(__name__)
 # Batch size for reviews per prompt
 REVIEWS_PER_BATCH = 100
 
+# Rough token accounting for the rate limiter: ~4 characters per prompt
+# token, plus the JSON object returned for each review (also the cap on the
+# response length)
+_CHARS_PER_TOKEN = 4
+_OUTPUT_TOKENS_PER_REVIEW = 40
+
+# Only the start of a long review is sent; the theme is almost always clear
+# from its first sentences
+_MAX_REVIEW_CHARS = 400
+
+
+# Field values in line-based fallback parsing
+_ID_PATTERN = re.compile(r'(?:review_id|id)[:\s]+([^\s,]+)', re.IGNORECASE)
+_REASON_PATTERN = re.compile(r'(?:short_reason|reason)[:\s]+(.+)', re.IGNORECASE)
+# A compact answer on one line: {"i": 3, "t": 2, "r": "..."} or i: 3, t: 2, r: ...
+_COMPACT_LINE_PATTERN = re.compile(
+    r'(?<!\w)"?i"?\s*:\s*"?(\d+)"?\s*,?\s*"?t"?\s*:\s*"?(\d+)"?(?:\s*,?\s*"?r"?\s*:\s*"?([^"}]*))?'
+)
+
+# Classification prompt, split around the reviews block. Reviews are sent as
+# a compact JSON array ({"i": number in batch, "x": text}) and themes by
+# number, which keeps both the prompt and the response short.
+_PROMPT_HEADER = """Tag each stock broking app review with exactly one theme.
+
+Themes:
+{theme_block}
+
+Reviews (i = review number, x = text):
+"""
+_PROMPT_FOOTER = """
+Return ONLY a JSON array with one object per review, no markdown:
+[{"i": <review number>, "t": <theme number>, "r": "<one sentence reason, no PII>"}]"""
+
 
 class ReviewClassifier:
     """Classify reviews into predefined themes using LLM"""
     
-    def __init__(self, llm_client: Optional[LLMClient] = None):
+    # Batches in a row that must fail every retry before the LLM is skipped
+    # for settings.LLM_CIRCUIT_COOLDOWN seconds
+    CIRCUIT_BREAK_AT = 3
+    
+    def __init__(self, llm_client: Optional[LLMClient] = None, cache: Optional[SQLiteCache] = None):
         """
         Initialize classifier
         
         Args:
             llm_client: LLM client instance (creates new one if not provided)
+            cache: Cache of earlier classifications (opens data/cache/classifier.sqlite
+                if not provided and settings.LLM_CACHE_ENABLED is set)
         """
         self.llm_client = llm_client or LLMClient()
         self.themes = get_theme_list()
         self.theme_descriptions = get_all_theme_descriptions()
         self.fallback_theme = get_fallback_theme()
+        # Finds any theme name in a lowercased line for line-based parsing
+        self._theme_pattern = re.compile('|'.join(re.escape(theme.lower()) for theme in self.themes))
+        self._themes_by_name = {theme.lower(): theme for theme in self.themes}
+        # Shared by all batches in flight; paces requests to the API quotas
+        self.rate_limiter = RateLimiter(
+            settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        )
+        # Caps requests in flight across every classify_batch call, so weeks
+        # classified at the same time don't multiply LLM_CONCURRENCY
+        self._in_flight = threading.BoundedSemaphore(max(1, settings.LLM_CONCURRENCY))
+        # Circuit breaker state, shared by all batches in flight
+        self._consecutive_failures = 0
+        self._circuit_opened_at = None
+        self._circuit_lock = threading.Lock()
+        # The parts of the classification prompt that are the same for every batch
+        # (themes are numbered from 1, in the order of self.themes)
+        theme_block = "\n".join(
+            f"{number}. {theme}: {self.theme_descriptions[theme]}"
+            for number, theme in enumerate(self.themes, 1)
+        )
+        self._prompt_header = _PROMPT_HEADER.format(theme_block=theme_block)
+        self._prompt_footer = _PROMPT_FOOTER
+        if cache is None and settings.LLM_CACHE_ENABLED:
+            cache = SQLiteCache(os.path.join(settings.CACHE_DIR, "classifier.sqlite"))
+        self.cache = cache
+        # A classification only holds for the same model and theme definitions
+        model_name = str(getattr(self.llm_client, 'model_name', settings.GEMINI_MODEL))
+        self._cache_key_prefix = f"{model_name}\x1f{theme_block}\x1f".encode('utf-8')
     
     def classify_batch(self, reviews: List[Dict[str, Any]], batch_name: str = "batch") -> List[Dict[str, Any]]:
         """
         Classify a batch of reviews into themes
-        Reviews are grouped into batches of 30 and processed with retry logic and delays
+        Reviews are grouped into batches of 100 and processed with retry logic and delays;
+        up to settings.LLM_CONCURRENCY batches are in flight at once, counting
+        other classify_batch calls running at the same time
         
         Args:
             reviews: List of review dictionaries with review_id, title, text
@@ -66,62 +144,110 @@ class ReviewClassifier:
             logger.info(f"No valid reviews (>= {MIN_REVIEW_LENGTH} chars) to classify for {batch_name}")
             return []
         
-        logger.info(f"Classifying {len(valid_reviews)} reviews for {batch_name} (batches of {REVIEWS_PER_BATCH})")
+        # Short reviews with an obvious theme don't need the LLM
+        known_classifications = []
+        reviews_to_send = []
+        for review in valid_reviews:
+            rule_match = match_fast_rule(review.get('text', '').strip())
+            if rule_match:
+                theme, keyword = rule_match
+                known_classifications.append({
+                    "review_id": review.get('review_id'),
+                    "chosen_theme": theme,
+                    "short_reason": f"Matched rule: {keyword}"
+                })
+            else:
+                reviews_to_send.append(review)
+        if known_classifications:
+            logger.info(f"Classified {len(known_classifications)} short reviews by keyword rules for {batch_name}")
+        
+        # Reviews with the same title and text ("good app") are classified
+        # once; the others get a copy of that result at the end
+        duplicate_ids = {}  # review_id of the review that's kept -> review_ids of its duplicates
+        unique_reviews = {}
+        for review in reviews_to_send:
+            kept = unique_reviews.setdefault(_review_content(review), review)
+            if kept is not review:
+                duplicate_ids.setdefault(kept.get('review_id'), []).append(review.get('review_id'))
+        if duplicate_ids:
+            reviews_to_send = list(unique_reviews.values())
+            logger.info(
+                f"Classifying {sum(len(ids) for ids in duplicate_ids.values())} duplicate reviews "
+                f"together with their first copy for {batch_name}"
+            )
+        
+        # Reviews classified on an earlier run don't need another request
+        if self.cache is not None and reviews_to_send:
+            cache_keys = [self._cache_key(review) for review in reviews_to_send]
+            cached = self.cache.get_many(cache_keys)
+            if cached:
+                remaining = reviews_to_send
+                reviews_to_send = []
+                for review, key in zip(remaining, cache_keys):
+                    if key in cached:
+                        known_classifications.append({"review_id": review.get('review_id'), **cached[key]})
+                    else:
+                        reviews_to_send.append(review)
+                logger.info(f"Reusing {len(cached)} cached classifications for {batch_name}")
+        
+        if not reviews_to_send:
+            known_classifications = _copy_to_duplicates(known_classifications, duplicate_ids)
+            logger.info(f"Successfully classified {len(known_classifications)} reviews for {batch_name}")
+            return known_classifications
+        
+        logger.info(f"Classifying {len(reviews_to_send)} reviews for {batch_name} (batches of {REVIEWS_PER_BATCH})")
         
         # Split reviews into batches of 30
         batches = [
-            valid_reviews[i:i + REVIEWS_PER_BATCH]
-            for i in range(0, len(valid_reviews), REVIEWS_PER_BATCH)
+            reviews_to_send[i:i + REVIEWS_PER_BATCH]
+            for i in range(0, len(reviews_to_send), REVIEWS_PER_BATCH)
         ]
         
         logger.info(f"Split into {len(batches)} batches")
         
-        all_classifications = []
+        all_classifications = known_classifications
         total_processed = 0
         
-        # Process each batch with retry logic and delays
-        for batch_idx, batch_reviews in enumerate(batches, 1):
-            batch_label = f"{batch_name}_batch_{batch_idx}"
-            batch_size = len(batch_reviews)
-            total_processed += batch_size
-            
-            logger.info(f"\n{'-' * 60}")
-            logger.info(f"Processing {batch_label}: {batch_size} reviews")
-            logger.info(f"Progress: {total_processed}/{len(valid_reviews)} reviews ({total_processed/len(valid_reviews)*100:.1f}%)")
-            
-            # Log review IDs in this batch
-            review_ids = [r.get('review_id', 'unknown')[:50] for r in batch_reviews[:5]]  # Show first 5
-            if len(batch_reviews) > 5:
-                logger.info(f"Review IDs in batch: {', '.join(review_ids)} ... (+{len(batch_reviews)-5} more)")
-            else:
-                logger.info(f"Review IDs in batch: {', '.join(review_ids)}")
-            
-            # Classify this batch with retry logic
-            batch_classifications = self._classify_batch_with_retry(
-                batch_reviews,
-                batch_label
-            )
-            
-            # Log classification results for this batch
-            if batch_classifications:
-                batch_theme_counts = {}
-                for cls in batch_classifications:
-                    theme = cls.get('chosen_theme', 'Unknown')
-                    batch_theme_counts[theme] = batch_theme_counts.get(theme, 0) + 1
+        # Each batch is one LLM request and almost all of its time is spent
+        # waiting on the network, so several batches are sent at once. The
+        # rate limiter in _classify_batch_with_retry keeps them within the
+        # API's request and token quotas.
+        workers = max(1, min(settings.LLM_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for batch_idx, batch_reviews in enumerate(batches, 1):
+                batch_label = f"{batch_name}_batch_{batch_idx}"
                 
-                logger.info(f"Batch {batch_idx} classified: {len(batch_classifications)} reviews")
-                if batch_theme_counts:
-                    theme_summary = ', '.join([f"{theme} ({count})" for theme, count in sorted(batch_theme_counts.items(), key=lambda x: x[1], reverse=True)[:3]])
-                    logger.info(f"  Themes: {theme_summary}")
-            
-            all_classifications.extend(batch_classifications)
+                # Log review IDs in this batch
+                review_ids = [r.get('review_id', 'unknown')[:50] for r in batch_reviews[:5]]  # Show first 5
+                if len(batch_reviews) > 5:
+                    logger.info(f"Sending {batch_label}: {len(batch_reviews)} reviews ({', '.join(review_ids)} ... +{len(batch_reviews)-5} more)")
+                else:
+                    logger.info(f"Sending {batch_label}: {len(batch_reviews)} reviews ({', '.join(review_ids)})")
+                
+                # Classify this batch with retry logic
+                futures.append(executor.submit(self._classify_batch_with_retry, batch_reviews, batch_label))
             
-            # Add delay between batches (except for the last one)
-            if batch_idx < len(batches):
-                delay = settings.LLM_BATCH_DELAY
-                logger.info(f"Waiting {delay}s before next batch...")
-                time.sleep(delay)
+            # Collect results in batch order
+            for batch_idx, (batch_reviews, future) in enumerate(zip(batches, futures), 1):
+                batch_classifications = future.result()
+                total_processed += len(batch_reviews)
+                
+                logger.info(f"\n{'-' * 60}")
+                logger.info(f"Progress: {total_processed}/{len(reviews_to_send)} reviews ({total_processed/len(reviews_to_send)*100:.1f}%)")
+                
+                # Log classification results for this batch
+                if batch_classifications:
+                    batch_theme_counts = Counter(cls.get('chosen_theme', 'Unknown') for cls in batch_classifications)
+                    
+                    logger.info(f"Batch {batch_idx} classified: {len(batch_classifications)} reviews")
+                    if batch_theme_counts:
+                        theme_summary = ', '.join([f"{theme} ({count})" for theme, count in batch_theme_counts.most_common(3)])
+                        logger.info(f"  Themes: {theme_summary}")
+                
+                all_classifications.extend(batch_classifications)
         
+        all_classifications = _copy_to_duplicates(all_classifications, duplicate_ids)
         logger.info(f"Successfully classified {len(all_classifications)} reviews for {batch_name}")
         return all_classifications
     
@@ -141,18 +267,53 @@ class ReviewClassifier:
         rate_limit_delay = settings.LLM_RATE_LIMIT_DELAY
         
         for attempt in range(1, max_retries + 1):
+            if self._circuit_open():
+                logger.warning(f"LLM unavailable, using fallback classifications for {batch_label}")
+                return self._create_fallback_classifications(reviews)
+            
             try:
                 # Build classification prompt
                 prompt = self._build_classification_prompt(reviews)
                 
-                # Get LLM response
-                raw_response = self.llm_client.generate(prompt)
+                # Wait for a free request slot and the request/token quota,
+                # then get LLM response. Each retry allows a longer response,
+                # in case the last one was cut off
+                with self._in_flight:
+                    self.rate_limiter.wait(tokens=_estimate_tokens(prompt, len(reviews)))
+                    raw_response = self.llm_client.generate(
+                        prompt, max_output_tokens=len(reviews) * _OUTPUT_TOKENS_PER_REVIEW * attempt
+                    )
+                self.rate_limiter.record_success()
                 classifications = self._parse_llm_response(raw_response, reviews)
                 
+                # Reviews the response answered at all; an invalid theme still
+                # counts and gets the fallback theme below
+                answered_ids = {
+                    c.get('review_id') for c in classifications
+                    if isinstance(c, dict) and c.get('review_id') is not None
+                }
+                missing = [review for review in reviews if review.get('review_id') not in answered_ids]
+                if len(missing) == len(reviews):
+                    raise ValueError(f"No usable classifications in LLM response: {raw_response[:200]!r}")
+                self._record_batch_result(success=True)
+                
                 # Validate and apply guardrails
                 validated_classifications = self._validate_classifications(classifications, reviews)
+                self._cache_classifications(reviews, validated_classifications, classifications)
+                logger.info(f"Successfully classified {len(reviews) - len(missing)} reviews for {batch_label}")
+                
+                if missing:
+                    # Usually a response cut off at the output cap: ask again
+                    # for just the reviews it didn't get to
+                    logger.warning(f"{len(missing)} reviews missing from the response for {batch_label}, sending them again")
+                    resent = {
+                        c['review_id']: c
+                        for c in self._classify_batch_with_retry(missing, f"{batch_label}_rest")
+                    }
+                    validated_classifications = [
+                        resent.get(c['review_id'], c) for c in validated_classifications
+                    ]
                 
-                logger.info(f"Successfully classified {len(validated_classifications)} reviews for {batch_label}")
                 return validated_classifications
                 
             except Exception as e:
@@ -165,27 +326,37 @@ class ReviewClassifier:
                 )
                 is_deadline = "504" in error_str or "DeadlineExceeded" in error_str
                 
+                retry_after = retry_after_seconds(e) if is_rate_limit else None
+                if is_rate_limit:
+                    # Slow down every batch sharing this limiter, not just this one
+                    self.rate_limiter.record_throttled(retry_after=retry_after)
+                
                 if attempt < max_retries:
                     # Calculate delay
                     if is_rate_limit:
-                        delay = rate_limit_delay
+                        # Wait as long as the API asked, if it said; otherwise
+                        # never retry sooner than rate_limit_delay
+                        if retry_after is not None:
+                            delay = min(retry_after, settings.LLM_MAX_BACKOFF)
+                        else:
+                            delay = max(rate_limit_delay, _backoff_delay(attempt, base_delay))
                         logger.warning(
                             f"Rate limit hit for {batch_label} (attempt {attempt}/{max_retries}). "
-                            f"Waiting {delay}s before retry..."
+                            f"Waiting {delay:.1f}s before retry..."
                         )
                     elif is_deadline:
                         # Exponential backoff for deadline errors
-                        delay = base_delay * (2 ** (attempt - 1))
+                        delay = _backoff_delay(attempt, base_delay)
                         logger.warning(
                             f"Deadline exceeded for {batch_label} (attempt {attempt}/{max_retries}). "
-                            f"Waiting {delay}s before retry..."
+                            f"Waiting {delay:.1f}s before retry..."
                         )
                     else:
                         # Exponential backoff for other errors
-                        delay = base_delay * (2 ** (attempt - 1))
+                        delay = _backoff_delay(attempt, base_delay)
                         logger.warning(
                             f"Error classifying {batch_label} (attempt {attempt}/{max_retries}): {error_str}. "
-                            f"Waiting {delay}s before retry..."
+                            f"Waiting {delay:.1f}s before retry..."
                         )
                     
                     time.sleep(delay)
@@ -195,11 +366,85 @@ class ReviewClassifier:
                         f"Max retries reached for {batch_label}. Using fallback classifications. "
                         f"Error: {error_str}"
                     )
+                    self._record_batch_result(success=False)
                     return self._create_fallback_classifications(reviews)
         
         # Should not reach here, but just in case
         return self._create_fallback_classifications(reviews)
     
+    def _circuit_open(self) -> bool:
+        """Check if recent batches failed so often that the LLM should be skipped"""
+        with self._circuit_lock:
+            if self._circuit_opened_at is None:
+                return False
+            if time.monotonic() - self._circuit_opened_at >= settings.LLM_CIRCUIT_COOLDOWN:
+                # Cooldown over: try the LLM again
+                self._circuit_opened_at = None
+                self._consecutive_failures = 0
+                return False
+            return True
+    
+    def _record_batch_result(self, success: bool):
+        """
+        Track consecutive batches that failed every retry
+        
+        Args:
+            success: True if the LLM answered, False if the batch ran out of retries
+        """
+        with self._circuit_lock:
+            if success:
+                self._consecutive_failures = 0
+                return
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.CIRCUIT_BREAK_AT and self._circuit_opened_at is None:
+                self._circuit_opened_at = time.monotonic()
+                logger.error(
+                    f"{self._consecutive_failures} batches in a row failed all retries; "
+                    f"skipping the LLM for {settings.LLM_CIRCUIT_COOLDOWN:.0f}s"
+                )
+    
+    def _cache_key(self, review: Dict[str, Any]) -> str:
+        """
+        Cache key for a review: hash of model, themes, title and text
+        
+        The review ID isn't part of it, so the same text posted again (in
+        this week or a later one) reuses the earlier classification.
+        """
+        title, text = _review_content(review)
+        digest = hashlib.sha256(self._cache_key_prefix)
+        digest.update(f"{title}\x1f{text}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _cache_classifications(self, reviews: List[Dict[str, Any]], classifications: List[Dict[str, Any]],
+                               parsed: List[Any]):
+        """
+        Store the LLM's classifications so later runs can reuse them
+        
+        Fallbacks, and answers only recovered by line-based parsing of a
+        malformed response, aren't stored, so those reviews are sent again
+        next time.
+        
+        Args:
+            reviews: Reviews in the batch
+            classifications: Validated classifications, one per review in the same order
+            parsed: Classifications as parsed from the response
+        """
+        if self.cache is None:
+            return
+        from_text = {
+            c.get('review_id') for c in parsed
+            if isinstance(c, dict) and c.get('parsed_from_text')
+        }
+        self.cache.set_many({
+            self._cache_key(review): {
+                "chosen_theme": classification["chosen_theme"],
+                "short_reason": classification["short_reason"],
+            }
+            for review, classification in zip(reviews, classifications)
+            if not str(classification.get("short_reason", "")).startswith("Fallback")
+            and review.get('review_id') not in from_text
+        })
+    
     def _build_classification_prompt(self, reviews: List[Dict[str, Any]]) -> str:
         """
         Build the LLM classification prompt
@@ -210,48 +455,17 @@ class ReviewClassifier:
         Returns:
             Classification prompt string
         """
-        # Build theme list
-        theme_block = "\n".join(
-            f"- {theme}: {desc}" 
-            for theme, desc in self.theme_descriptions.items()
-        )
-        
-        # Build review list (exclude internal fields like _week_key)
-        reviews_block = ""
-        for review in reviews:
-            review_id = review.get('review_id', 'unknown')
-            title = review.get('title', '')
-            text = review.get('text', '')
-            if title:
-                reviews_block += f"\nReview ID: {review_id}\nTitle: {title}\nText: {text}\n"
-            else:
-                reviews_block += f"\nReview ID: {review_id}\nText: {text}\n"
-        
-        prompt = f"""You are tagging stock broking app reviews into at most 5 fixed themes.
-
-Allowed themes:
-
-{theme_block}
-
-For each review, output:
-- review_id
-- chosen_theme (must be exactly one from the above list)
-- short_reason (1 sentence, no PII)
-
-Reviews:
-
-{reviews_block}
-
-Output format: Return a JSON array where each object has:
-{{
-  "review_id": "<review_id>",
-  "chosen_theme": "<exact theme name from allowed list>",
-  "short_reason": "<one sentence reason, no PII>"
-}}
-
-Return ONLY valid JSON, no markdown or additional text."""
+        # Build review list (exclude internal fields like _week_key); reviews
+        # are numbered by position in the batch
+        reviews_block = json_utils.dumps([
+            {
+                "i": number,
+                "x": (f"{review['title']}: {review.get('text', '')}" if review.get('title') else review.get('text', ''))[:_MAX_REVIEW_CHARS]
+            }
+            for number, review in enumerate(reviews, 1)
+        ]).decode('utf-8')
         
-        return prompt
+        return self._prompt_header + reviews_block + self._prompt_footer
     
     def _parse_llm_response(self, raw_response: str, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -267,33 +481,66 @@ Return ONLY valid JSON, no markdown or additional text."""
         # Clean response
         cleaned = raw_response.strip()
         
-        # Remove markdown code blocks if present
-        if "```" in cleaned:
-            # Extract JSON from code blocks
-            json_match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', cleaned, re.DOTALL)
-            if json_match:
-                cleaned = json_match.group(1)
-            else:
-                # Try to find JSON array in the text
-                json_match = re.search(r'(\[.*?\])', cleaned, re.DOTALL)
-                if json_match:
-                    cleaned = json_match.group(1)
+        # Pull the JSON array out of markdown code blocks or surrounding text
+        if not cleaned.startswith(('[', '{')):
+            json_array = _extract_json_array(cleaned)
+            if json_array is not None:
+                cleaned = json_array
         
         # Try to parse as JSON
         try:
-            data = json.loads(cleaned)
+            data = json_utils.loads(cleaned)
             if isinstance(data, list):
-                return data
+                return [self._expand_compact_classification(c, reviews) for c in data]
             elif isinstance(data, dict):
                 # Single classification wrapped in dict
-                return [data]
-        except json.JSONDecodeError:
+                return [self._expand_compact_classification(data, reviews)]
+        except json_utils.JSONDecodeError:
+            # A response cut off at the output cap still has its first
+            # objects intact
+            salvaged = _salvage_json_objects(cleaned)
+            if salvaged:
+                logger.warning(f"Response JSON was cut off, using the {len(salvaged)} complete entries")
+                return [self._expand_compact_classification(c, reviews) for c in salvaged]
             logger.warning(f"Failed to parse JSON response, attempting line-based parsing")
             # Try line-based parsing as fallback
             return self._parse_line_based_response(raw_response, reviews)
         
         return []
     
+    def _expand_compact_classification(self, classification: Any, reviews: List[Dict[str, Any]]) -> Any:
+        """
+        Convert a compact {"i", "t", "r"} classification to the full field names
+        
+        Args:
+            classification: One item of the parsed response
+            reviews: Reviews in the batch ("i" is a 1-based position in this list)
+        
+        Returns:
+            Dictionary with review_id, chosen_theme and short_reason; anything
+            not in the compact form (e.g. already using full names) is returned as is
+        """
+        if not isinstance(classification, dict) or 'i' not in classification:
+            return classification
+        
+        try:
+            position = int(classification['i'])
+            review_id = reviews[position - 1].get('review_id') if position >= 1 else None
+        except (TypeError, ValueError, IndexError):
+            review_id = None
+        
+        # Theme number from the prompt's list; keep anything else for validation to reject
+        theme = classification.get('t', '')
+        try:
+            theme = self.themes[int(theme) - 1] if int(theme) >= 1 else str(theme)
+        except (TypeError, ValueError, IndexError):
+            theme = str(theme)
+        
+        expanded = {"chosen_theme": theme, "short_reason": classification.get('r', 'No reason provided')}
+        if review_id is not None:
+            expanded["review_id"] = review_id
+        return expanded
+    
     def _parse_line_based_response(self, text: str, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Parse line-based response format as fallback
@@ -303,7 +550,7 @@ Return ONLY valid JSON, no markdown or additional text."""
             reviews: Original reviews list
             
         Returns:
-            List of classification dictionaries
+            List of classification dictionaries (marked with parsed_from_text)
         """
         classifications = []
         lines = text.split('\n')
@@ -317,22 +564,35 @@ Return ONLY valid JSON, no markdown or additional text."""
             if not line:
                 continue
             
+            # Compact answer (review and theme numbers) on a single line
+            compact_match = _COMPACT_LINE_PATTERN.search(line)
+            if compact_match:
+                review_number, theme_number, reason = compact_match.groups()
+                classification = self._expand_compact_classification(
+                    {"i": review_number, "t": theme_number, "r": (reason or '').strip() or 'No reason provided'},
+                    reviews,
+                )
+                classification["parsed_from_text"] = True
+                classifications.append(classification)
+                continue
+            
+            lowered = line.lower()
+            
             # Try to extract review_id
-            if 'review_id' in line.lower() or 'id:' in line.lower():
-                match = re.search(r'(?:review_id|id)[:\s]+([^\s,]+)', line, re.IGNORECASE)
+            if 'review_id' in lowered or 'id:' in lowered:
+                match = _ID_PATTERN.search(line)
                 if match:
                     current_review_id = match.group(1)
             
             # Try to extract theme
-            if 'chosen_theme' in line.lower() or 'theme:' in line.lower():
-                for theme in self.themes:
-                    if theme.lower() in line.lower():
-                        current_theme = theme
-                        break
+            if 'chosen_theme' in lowered or 'theme:' in lowered:
+                theme_match = self._theme_pattern.search(lowered)
+                if theme_match:
+                    current_theme = self._themes_by_name[theme_match.group(0)]
             
             # Try to extract reason
-            if 'short_reason' in line.lower() or 'reason:' in line.lower():
-                reason_match = re.search(r'(?:short_reason|reason)[:\s]+(.+)', line, re.IGNORECASE)
+            if 'short_reason' in lowered or 'reason:' in lowered:
+                reason_match = _REASON_PATTERN.search(line)
                 if reason_match:
                     current_reason = reason_match.group(1).strip()
             
@@ -341,7 +601,8 @@ Return ONLY valid JSON, no markdown or additional text."""
                 classifications.append({
                     "review_id": current_review_id,
                     "chosen_theme": current_theme,
-                    "short_reason": current_reason
+                    "short_reason": current_reason,
+                    "parsed_from_text": True
                 })
                 # Reset for next review
                 current_review_id = None
@@ -362,22 +623,22 @@ Return ONLY valid JSON, no markdown or additional text."""
             Validated classification results
         """
         validated = []
-        review_ids = {review.get('review_id') for review in reviews}
-        classification_map = {c.get('review_id'): c for c in classifications}
+        classification_map = {c['review_id']: c for c in classifications if 'review_id' in c}
         
         for review in reviews:
             review_id = review.get('review_id')
             classification = classification_map.get(review_id)
             
             if classification:
-                theme = classification.get('chosen_theme', '').strip()
+                raw_theme = classification.get('chosen_theme', '')
+                theme = raw_theme.strip()
                 reason = classification.get('short_reason', 'No reason provided')
                 
                 # Validate theme
                 if not is_valid_theme(theme):
                     logger.warning(f"Invalid theme '{theme}' for review {review_id}, using fallback")
                     theme = self.fallback_theme
-                    reason = f"Fallback applied: invalid theme '{classification.get('chosen_theme')}'"
+                    reason = f"Fallback applied: invalid theme '{raw_theme}'"
                 
                 validated.append({
                     "review_id": review_id,
@@ -415,7 +676,134 @@ Return ONLY valid JSON, no markdown or additional text."""
         ]
 
 
-def aggregate_theme_counts(classifications: List[Dict[str, Any]]) -> Dict[str, int]:
+def _extract_json_array(text: str) -> Optional[str]:
+    """
+    Find the first complete JSON array in text (e.g. inside a ```json block)
+    
+    A single pass that tracks bracket depth and skips brackets inside
+    strings, so it takes linear time even on truncated output.
+    
+    Returns:
+        The array's text, or None if there's no '[' or the array never closes
+    """
+    start = text.find('[')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for end in range(start, len(text)):
+        char = text[end]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return text[start:end + 1]
+    return None
+
+
+def _salvage_json_objects(text: str) -> List[Any]:
+    """
+    Parse the complete objects of a JSON array that was cut off
+    
+    Uses the same single bracket-tracking pass as _extract_json_array.
+    
+    Returns:
+        The objects directly inside the first array in text that are
+        complete (an unfinished last object is dropped)
+    """
+    start = text.find('[')
+    if start == -1:
+        return []
+    
+    objects = []
+    depth = 0
+    object_start = None
+    in_string = False
+    escaped = False
+    for pos in range(start, len(text)):
+        char = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+            if char == '{' and depth == 2:
+                object_start = pos
+        elif char in ']}':
+            depth -= 1
+            if depth == 0:
+                break
+            if char == '}' and depth == 1 and object_start is not None:
+                try:
+                    objects.append(json_utils.loads(text[object_start:pos + 1]))
+                except json_utils.JSONDecodeError:
+                    pass
+                object_start = None
+    return objects
+
+
+def _review_content(review: Dict[str, Any]) -> Tuple[str, str]:
+    """The (title, text) a review is classified on, with outer whitespace removed"""
+    return (review.get('title') or '').strip(), (review.get('text') or '').strip()
+
+
+def _copy_to_duplicates(classifications: List[Dict[str, Any]],
+                        duplicate_ids: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Add a copy of each classification for the duplicates of its review
+    
+    Args:
+        classifications: Classification results
+        duplicate_ids: review_id -> review_ids of reviews with the same content
+    
+    Returns:
+        The classifications followed by the copies
+    """
+    if not duplicate_ids:
+        return classifications
+    copies = [
+        {**classification, "review_id": duplicate_id}
+        for classification in classifications
+        for duplicate_id in duplicate_ids.get(classification.get('review_id'), ())
+    ]
+    return classifications + copies
+
+
+def _backoff_delay(attempt: int, base_delay: float) -> float:
+    """
+    Exponential backoff with random jitter, capped at settings.LLM_MAX_BACKOFF
+    
+    The jitter keeps batches that failed together (e.g. on the same rate
+    limit) from all retrying at the same moment.
+    """
+    delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, base_delay)
+    return min(delay, settings.LLM_MAX_BACKOFF)
+
+
+def _estimate_tokens(prompt: str, review_count: int) -> int:
+    """Estimate the tokens one classification request uses (prompt + response)"""
+    return len(prompt) // _CHARS_PER_TOKEN + review_count * _OUTPUT_TOKENS_PER_REVIEW
+
+
+def aggregate_theme_counts(classifications: List[Dict[str, Any]]) -> Counter:
     """
     Aggregate theme counts from classifications
     
@@ -423,14 +811,11 @@ def aggregate_theme_counts(classifications: List[Dict[str, Any]]) -> Dict[str, i
         classifications: List of classification results
         
     Returns:
-        Dictionary mapping theme names to counts
+        Counter (a dictionary) mapping theme names to counts
     """
-    theme_counts = Counter()
-    for classification in classifications:
-        theme = classification.get('chosen_theme', '')
-        if theme:
-            theme_counts[theme] += 1
-    return dict(theme_counts)
+    # Counter counts an iterable in C, much faster than += per classification
+    themes = (classification.get('chosen_theme') for classification in classifications)
+    return Counter(theme for theme in themes if theme)
 
 
 def get_top_themes_by_count(classifications: List[Dict[str, Any]], max_themes: int = 5) -> List[tuple[str, int]]:
@@ -444,7 +829,19 @@ def get_top_themes_by_count(classifications: List[Dict[str, Any]], max_themes: i
     Returns:
         List of (theme_name, count) tuples, sorted by count descending
     """
-    theme_counts = aggregate_theme_counts(classifications)
-    sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
-    return sorted_themes[:max_themes]
+    return get_top_themes(aggregate_theme_counts(classifications), max_themes=max_themes)
+
+
+def get_top_themes(theme_counts: Dict[str, int], max_themes: int = 5) -> List[tuple[str, int]]:
+    """
+    Get top themes from already aggregated theme counts, sorted descending
+    
+    Args:
+        theme_counts: Dictionary mapping theme names to counts (see aggregate_theme_counts)
+        max_themes: Maximum number of themes to return
+    
+    Returns:
+        List of (theme_name, count) tuples, sorted by count descending
+    """
+    return Counter(theme_counts).most_common(max_themes)
 
@@ -11,6 +11,8 @@ Think of it like organizing mail into different boxes:
 
 It uses AI (Google's Gemini) to read each review and decide which box it belongs in.
 """
+from collections import Counter
+
 from layer_2_theme_extraction.weekly_processor import WeeklyThemeProcessor
 from layer_2_theme_extraction.classifier import REVIEWS_PER_BATCH
 from layer_1_data_import.storage import ReviewStorage
@@ -73,37 +75,45 @@ def classify_all_reviews(force_regenerate: bool = False) -> list[dict]:
         return []  # Nothing to do!
     
     # Show the user what we're about to process
+    # (review counts are logged as each week is loaded for classification,
+    # so the week files aren't all read an extra time just to count them)
     logger.info(f"\nFound {len(available_weeks)} weeks to process:")
     for idx, week in enumerate(available_weeks, 1):
-        reviews = storage.load_week_reviews(week)  # Load reviews for this week
-        # Count how many are valid (at least 20 characters)
-        valid_reviews = [r for r in reviews if len(r.get('text', '').strip()) >= 20]
-        logger.info(f"  {idx}. Week {week}: {len(reviews)} total reviews ({len(valid_reviews)} valid >= 20 chars)")
+        logger.info(f"  {idx}. Week {week}")
     
     # Create a processor that will do the actual classification
-    processor = WeeklyThemeProcessor()
+    # (reusing our storage, so the week list isn't scanned again)
+    processor = WeeklyThemeProcessor(storage=storage)
     # Process all weeks - this sends reviews to AI and gets themes back
     results = processor.process_all_weeks(force_regenerate=force_regenerate)
     
     # ============================================================
     # Calculate summary statistics
     # ============================================================
-    # Count up how many reviews were successfully classified
-    total_classified = sum(r.get('classified_reviews', 0) for r in results if 'classified_reviews' in r)
-    total_reviews = sum(r.get('total_reviews', 0) for r in results if 'total_reviews' in r)
-    successful_weeks = len([r for r in results if 'error' not in r])  # Weeks that worked
-    failed_weeks = len([r for r in results if 'error' in r])  # Weeks that had errors
-    skipped_weeks = len([r for r in results if r.get('skipped', False)])  # Weeks that were skipped
-    
-    # Calculate how many batches we processed (for reporting)
-    total_batches = 0
+    # Add everything up in one pass over the weekly results
+    total_classified = 0  # Reviews that were successfully classified
+    total_reviews = 0
+    successful_weeks = 0  # Weeks that worked
+    failed_weeks = 0  # Weeks that had errors
+    skipped_weeks = 0  # Weeks that were skipped
+    total_batches = 0  # How many batches we processed (for reporting)
+    # Which themes were most common across all weeks
+    # (each week's counts were already aggregated by the processor)
+    all_theme_counts = Counter()
     for result in results:
-        if 'classified_reviews' in result:
-            classified = result.get('classified_reviews', 0)
-            # Calculate batches: if we classified 65 reviews in batches of 30,
-            # that's 3 batches (30 + 30 + 5)
-            batches = (classified + REVIEWS_PER_BATCH - 1) // REVIEWS_PER_BATCH
-            total_batches += batches
+        if 'error' in result:
+            failed_weeks += 1
+        else:
+            successful_weeks += 1
+        if result.get('skipped', False):
+            skipped_weeks += 1
+        total_reviews += result.get('total_reviews', 0)
+        classified = result.get('classified_reviews', 0)
+        total_classified += classified
+        # Calculate batches: if we classified 65 reviews in batches of 30,
+        # that's 3 batches (30 + 30 + 5)
+        total_batches += (classified + REVIEWS_PER_BATCH - 1) // REVIEWS_PER_BATCH
+        all_theme_counts.update(result.get('theme_counts', {}))
     
     # Calculate how long the whole process took
     end_time = datetime.now()
@@ -126,17 +136,10 @@ def classify_all_reviews(force_regenerate: bool = False) -> list[dict]:
     
     # Show which themes were most common across all weeks
     # This helps understand what users are talking about most
-    all_theme_counts = {}
-    for result in results:
-        if 'theme_counts' in result:
-            for theme, count in result.get('theme_counts', {}).items():
-                all_theme_counts[theme] = all_theme_counts.get(theme, 0) + count
-    
     if all_theme_counts:
         logger.info(f"\nOverall Theme Distribution:")
         # Sort themes by count (most common first)
-        sorted_themes = sorted(all_theme_counts.items(), key=lambda x: x[1], reverse=True)
-        for theme, count in sorted_themes:
+        for theme, count in all_theme_counts.most_common():
             percentage = (count / total_classified * 100) if total_classified > 0 else 0
             logger.info(f"  - {theme}: {count} reviews ({percentage:.1f}%)")
     
@@ -209,7 +212,7 @@ def classify_last_week() -> dict:
     
     if result.get('theme_counts'):
         logger.info(f"\nTheme Distribution:")
-        sorted_themes = sorted(result.get('theme_counts', {}).items(), key=lambda x: x[1], reverse=True)
+        sorted_themes = Counter(result['theme_counts']).most_common()
         total = result.get('classified_reviews', 0)
         for theme, count in sorted_themes:
             percentage = (count / total * 100) if total > 0 else 0
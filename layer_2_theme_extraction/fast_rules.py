@@ -0,0 +1,64 @@
+"""
+Keyword rules for reviews whose theme is obvious without the LLM
+Short reviews like "app keeps crashing" or "SIP not getting registered" are
+assigned a theme directly when exactly one rule matches them
+"""
+import re
+from typing import Optional, Tuple
+
+# Only reviews up to this many characters are matched; longer ones usually
+# mention several things and are left to the LLM
+MAX_RULE_TEXT_LENGTH = 80
+
+# Shortest keyword match that counts (avoids hits on short fragments)
+MIN_MATCH_LENGTH = 4
+
+# (pattern, theme) pairs, one per theme
+FAST_RULES = [
+    (re.compile(
+        r'\b(?:crash(?:es|ed|ing)?|freez(?:e|es|ing)|force clos(?:e|es|ing)|hang(?:s|ing)|'
+        r'not (?:loading|opening)|login (?:issue|problem|error)s?)\b',
+        re.IGNORECASE,
+    ), "App Performance & Reliability"),
+    (re.compile(
+        r'\b(?:withdrawals?|deposits?|refunds?|upi (?:payment|issue|problem|error)s?|'
+        r'money (?:not|stuck)|settlements?)\b',
+        re.IGNORECASE,
+    ), "Payments, UPI & Settlements"),
+    (re.compile(
+        r'\b(?:mutual funds?|sips? (?:not|failed|cancel\w*)|redemptions?)\b',
+        re.IGNORECASE,
+    ), "Mutual Funds & SIP Experience"),
+    (re.compile(
+        r'\b(?:customer (?:care|support|service)|helpdesk|support team|no response)\b',
+        re.IGNORECASE,
+    ), "Support & Service Quality"),
+    (re.compile(
+        r'\b(?:orders? (?:not|rejected|failed|stuck)|charts?|charting)\b',
+        re.IGNORECASE,
+    ), "Trading Experience"),
+]
+
+
+def match_fast_rule(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the theme of a short review from the keyword rules
+    
+    Args:
+        text: Review text
+    
+    Returns:
+        Tuple of (theme, matched keyword), or None if the review is too long,
+        no rule matches, or rules for more than one theme match
+    """
+    if not text or len(text) > MAX_RULE_TEXT_LENGTH:
+        return None
+    
+    found = None
+    for pattern, theme in FAST_RULES:
+        match = pattern.search(text)
+        if match and len(match.group(0)) >= MIN_MATCH_LENGTH:
+            if found is not None:
+                return None  # Conflicting rules: let the LLM decide
+            found = (theme, match.group(0).lower())
+    return found
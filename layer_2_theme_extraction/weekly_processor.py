@@ -1,15 +1,17 @@
 """
 Weekly theme processor - processes reviews week-by-week and assigns themes
 """
-import json
 import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional
 
 from layer_1_data_import.storage import ReviewStorage
-from layer_2_theme_extraction.classifier import ReviewClassifier, aggregate_theme_counts, get_top_themes_by_count
+from layer_2_theme_extraction.classifier import ReviewClassifier, aggregate_theme_counts, get_top_themes
 from layer_2_theme_extraction.theme_config import MIN_REVIEW_LENGTH
 from config.settings import settings
+from utils import json_utils
+from utils.spam_filter import is_spam
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -47,8 +49,7 @@ class WeeklyThemeProcessor:
         if not force_regenerate and os.path.exists(themes_file):
             logger.info(f"Themes already exist for week {week_key}, skipping regeneration...")
             try:
-                with open(themes_file, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                existing_data = self._load_theme_summary(week_key, themes_file)
                 logger.info(f"Loaded existing themes for week {week_key}")
                 return {
                     "week_key": week_key,
@@ -95,6 +96,13 @@ class WeeklyThemeProcessor:
                 "top_themes": []
             }
         
+        # Drop spam/junk reviews; they'd only spend LLM tokens
+        spam_count = len(valid_reviews)
+        valid_reviews = [review for review in valid_reviews if not is_spam(review.get('text', ''))]
+        spam_count -= len(valid_reviews)
+        if spam_count:
+            logger.info(f"Skipping {spam_count} spam reviews for week {week_key}")
+        
         # Apply max reviews per week limit if configured
         max_reviews = settings.MAX_REVIEWS_PER_WEEK
         reviews_to_process = valid_reviews
@@ -109,7 +117,7 @@ class WeeklyThemeProcessor:
         
         # Aggregate theme counts
         theme_counts = aggregate_theme_counts(classifications)
-        top_themes = get_top_themes_by_count(classifications, max_themes=5)
+        top_themes = get_top_themes(theme_counts, max_themes=5)
         
         # Enrich reviews with theme assignments
         enriched_reviews = self._enrich_reviews_with_themes(reviews, classifications)
@@ -132,35 +140,32 @@ class WeeklyThemeProcessor:
         """
         Enrich reviews with theme assignments
         
+        The review dicts are updated in place (they're freshly loaded for
+        each week, so nothing else holds on to them).
+        
         Args:
             reviews: Original review list
             classifications: Classification results
             
         Returns:
-            Enriched reviews with theme information
+            The same reviews, with theme information added
         """
         classification_map = {
             c.get('review_id'): c
             for c in classifications
         }
         
-        enriched = []
         for review in reviews:
-            review_id = review.get('review_id')
-            classification = classification_map.get(review_id)
-            
-            enriched_review = review.copy()
+            classification = classification_map.get(review.get('review_id'))
             if classification:
-                enriched_review['theme'] = classification.get('chosen_theme')
-                enriched_review['theme_reason'] = classification.get('short_reason')
+                review['theme'] = classification.get('chosen_theme')
+                review['theme_reason'] = classification.get('short_reason')
             else:
                 # Review was too short or not classified
-                enriched_review['theme'] = None
-                enriched_review['theme_reason'] = None
-            
-            enriched.append(enriched_review)
+                review['theme'] = None
+                review['theme_reason'] = None
         
-        return enriched
+        return reviews
     
     def _save_theme_assignments(self, week_key: str, enriched_reviews: List[Dict[str, Any]], 
                                  theme_counts: Dict[str, int], top_themes: List[tuple[str, int]]):
@@ -175,14 +180,12 @@ class WeeklyThemeProcessor:
         """
         filename = os.path.join(self.themes_dir, f"themes_{week_key}.json")
         
-        from datetime import timedelta
-        week_start = datetime.strptime(week_key, "%Y-%m-%d")
-        week_end = week_start + timedelta(days=6)
+        week_end = date.fromisoformat(week_key) + timedelta(days=6)
         
         week_data = {
             "week_key": week_key,
             "week_start_date": week_key,
-            "week_end_date": week_end.strftime("%Y-%m-%d"),
+            "week_end_date": week_end.isoformat(),
             "total_reviews": len(enriched_reviews),
             "theme_counts": theme_counts,
             "top_themes": [
@@ -193,12 +196,67 @@ class WeeklyThemeProcessor:
         }
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(week_data, f, indent=2, ensure_ascii=False, default=str)
+            json_utils.dump_file(week_data, filename, indent=settings.PRETTY_JSON)
             logger.info(f"Saved theme assignments to {filename}")
+            # Everything but the reviews, so skipping this week later doesn't
+            # have to parse them
+            summary = {key: value for key, value in week_data.items() if key != "reviews"}
+            json_utils.dump_file(summary, self._summary_file(week_key))
         except Exception as e:
             logger.error(f"Error saving theme assignments to {filename}: {e}", exc_info=True)
     
+    def _summary_file(self, week_key: str) -> str:
+        """Path of the file with a week's theme counts (the themes file without reviews)"""
+        return os.path.join(self.themes_dir, f"summary_{week_key}.json")
+    
+    def _load_theme_summary(self, week_key: str, themes_file: str) -> Dict[str, Any]:
+        """
+        Load a week's theme counts without its reviews
+        
+        Uses the summary file saved next to the themes file, unless it is
+        missing or older than the themes file (then the full file is loaded).
+        
+        Args:
+            week_key: Week key
+            themes_file: Path of the week's themes file
+        
+        Returns:
+            Theme data dictionary (total_reviews, theme_counts, top_themes, ...)
+        """
+        summary_file = self._summary_file(week_key)
+        try:
+            if os.path.getmtime(summary_file) >= os.path.getmtime(themes_file):
+                return json_utils.load_file(summary_file)
+        except (OSError, json_utils.JSONDecodeError):
+            pass
+        return json_utils.load_file(themes_file)
+    
+    def _process_week_safely(self, week_key: str, force_regenerate: bool) -> Dict[str, Any]:
+        """
+        Process one week, turning any error into an error result
+        
+        Args:
+            week_key: Week key (YYYY-MM-DD format)
+            force_regenerate: If True, regenerate even if themes already exist
+        
+        Returns:
+            Result of process_week, or a dictionary with week_key and error
+        """
+        try:
+            logger.info(f"\n{'='*60}")
+            logger.info(f"Processing week {week_key}")
+            logger.info(f"{'='*60}")
+            
+            # Process each week independently - each week gets its own prompt
+            return self.process_week(week_key, force_regenerate=force_regenerate)
+        
+        except Exception as e:
+            logger.error(f"Error processing week {week_key}: {e}", exc_info=True)
+            return {
+                "week_key": week_key,
+                "error": str(e)
+            }
+    
     def process_all_weeks(self, force_regenerate: bool = False) -> List[Dict[str, Any]]:
         """
         Process all available weeks - each week's reviews are batched and sent in separate prompts
@@ -206,7 +264,9 @@ class WeeklyThemeProcessor:
         This strategy:
         - Processes each week independently
         - Batches all reviews from a week into a single prompt
-        - Processes weeks sequentially
+        - Processes up to settings.WEEK_CONCURRENCY weeks at once (they share
+          the classifier, so its rate limiter still bounds the total request
+          rate and at most settings.LLM_CONCURRENCY requests are in flight)
         
         Args:
             force_regenerate: If True, regenerate even if themes already exist
@@ -227,27 +287,15 @@ class WeeklyThemeProcessor:
         
         logger.info(f"Processing {len(available_weeks)} weeks (each week batched in separate prompts)")
         
-        results = []
-        skipped_count = 0
-        for week_key in available_weeks:
-            try:
-                logger.info(f"\n{'='*60}")
-                logger.info(f"Processing week {week_key}")
-                logger.info(f"{'='*60}")
-                
-                # Process each week independently - each week gets its own prompt
-                result = self.process_week(week_key, force_regenerate=force_regenerate)
-                results.append(result)
-                
-                if result.get("skipped"):
-                    skipped_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing week {week_key}: {e}", exc_info=True)
-                results.append({
-                    "week_key": week_key,
-                    "error": str(e)
-                })
+        # Weeks are independent and almost all of their time is spent waiting
+        # on the LLM, so several are processed at once (results stay in week order)
+        workers = max(1, min(settings.WEEK_CONCURRENCY, len(available_weeks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda week_key: self._process_week_safely(week_key, force_regenerate),
+                available_weeks
+            ))
+        skipped_count = len([r for r in results if r.get("skipped")])
         
         successful = len([r for r in results if 'error' not in r])
         total_reviews = sum(r.get('total_reviews', 0) for r in results if 'total_reviews' in r)
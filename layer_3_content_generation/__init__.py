@@ -3,11 +3,22 @@ Layer 3: Content Generation
 - Theme Summarization (map stage: chunk reviews per theme and summarize)
 - Pulse Document Assembler (reduce stage: create weekly pulse ≤250 words)
 - Weekly Pulse Generator (orchestrates map-reduce workflow)
+
+Submodules are imported lazily on first attribute access (PEP 562), so
+importing the package doesn't pull in the Gemini client unless it is
+actually used.
 """
-from .theme_summarizer import ThemeSummarizer
-from .pulse_assembler import PulseAssembler, MAX_WORD_COUNT
-from .weekly_pulse_generator import WeeklyPulseGenerator
-from .generate_pulse import generate_all_pulses, generate_pulse_for_week
+import importlib
+
+# Public name -> module that defines it
+_LAZY = {
+    'ThemeSummarizer': 'layer_3_content_generation.theme_summarizer',
+    'PulseAssembler': 'layer_3_content_generation.pulse_assembler',
+    'MAX_WORD_COUNT': 'layer_3_content_generation.pulse_assembler',
+    'WeeklyPulseGenerator': 'layer_3_content_generation.weekly_pulse_generator',
+    'generate_all_pulses': 'layer_3_content_generation.generate_pulse',
+    'generate_pulse_for_week': 'layer_3_content_generation.generate_pulse',
+}
 
 __all__ = [
     'ThemeSummarizer',
@@ -19,3 +30,14 @@ __all__ = [
 ]
 
 
+def __getattr__(name):
+    """Import the defining submodule the first time a public name is used"""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -11,16 +11,21 @@ A pulse is a one-page summary (250 words or less) that includes:
 
 Think of it like a weekly newsletter that tells the team what users are saying.
 """
-import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
 from layer_3_content_generation.weekly_pulse_generator import WeeklyPulseGenerator
 from config.settings import settings
+from utils import json_utils
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Theme files are named like themes_2025-11-24.json (the week's Monday)
+THEME_FILE_PATTERN = re.compile(r'^themes_(\d{4}-\d{2}-\d{2})\.json$')
+
 
 def generate_all_pulses(force_regenerate: bool = False) -> List[Dict[str, Any]]:
     """
@@ -56,11 +61,21 @@ def generate_all_pulses(force_regenerate: bool = False) -> List[Dict[str, Any]]:
         logger.error(f"Themes directory not found: {themes_dir}")
         return []  # Can't continue without theme files
     
-    # Find all theme files (they're named like: themes_2025-11-24.json)
-    theme_files = [
-        f for f in os.listdir(themes_dir)
-        if f.startswith('themes_') and f.endswith('.json')
-    ]
+    # Find all theme files as (week_key, path) pairs, in week order.
+    # scandir is used for the is_file() check, which it answers from the
+    # directory listing itself (no stat per entry, unlike os.path.isfile)
+    theme_files = []
+    with os.scandir(themes_dir) as entries:
+        for entry in entries:
+            match = THEME_FILE_PATTERN.match(entry.name)
+            if match and entry.is_file():
+                theme_files.append((match.group(1), entry.path))
+            elif entry.name.startswith('themes_') and entry.name.endswith('.json'):
+                # Looks like a theme file, but isn't one for a week
+                logger.warning(f"Skipping {entry.path}: not a themes_YYYY-MM-DD.json file")
+    theme_files.sort()
+    week_keys = [week_key for week_key, _ in theme_files]
+    theme_file_paths = [path for _, path in theme_files]
     
     if not theme_files:
         logger.warning("No theme files found")
@@ -70,36 +85,42 @@ def generate_all_pulses(force_regenerate: bool = False) -> List[Dict[str, Any]]:
     
     # Create a generator that will create the pulses
     generator = WeeklyPulseGenerator()
-    results = []  # Will hold all the pulses we create
     
-    # Process each week one by one
-    for theme_file in sorted(theme_files):
-        # Extract the week date from filename (themes_2025-11-24.json -> 2025-11-24)
-        week_key = theme_file.replace('themes_', '').replace('.json', '')
-        
+    def generate_week(week_key: str, theme_file_path: str) -> Dict[str, Any]:
+        """Generate the pulse for one theme file (errors become an error result)"""
         try:
             logger.info(f"\n{'=' * 80}")
             logger.info(f"Processing week: {week_key}")
             logger.info(f"{'=' * 80}")
             
+            # A week that already has a pulse doesn't need its (much larger)
+            # theme file loaded at all
+            if not force_regenerate:
+                existing_pulse = generator.load_existing_pulse(week_key)
+                if existing_pulse is not None:
+                    return existing_pulse
+            
             # Load the theme data for this week
             # This contains all the reviews organized by theme
-            theme_file_path = os.path.join(themes_dir, theme_file)
-            with open(theme_file_path, 'r', encoding='utf-8') as f:
-                theme_data = json.load(f)
+            theme_data = json_utils.load_file(theme_file_path)
             
             # Generate the pulse (summary) for this week
             # This uses AI to read all the themes and create a concise summary
-            pulse_data = generator.generate_pulse(week_key, theme_data, force_regenerate=force_regenerate)
-            results.append(pulse_data)
+            return generator.generate_pulse(week_key, theme_data, force_regenerate=force_regenerate)
             
         except Exception as e:
             # If something goes wrong, log the error but continue with other weeks
             logger.error(f"Error generating pulse for week {week_key}: {e}", exc_info=True)
-            results.append({
+            return {
                 "week_key": week_key,
                 "error": str(e)
-            })
+            }
+    
+    # Weeks don't depend on each other and mostly wait on the AI, so several
+    # are generated at the same time (results still come back in week order)
+    workers = max(1, min(settings.WEEK_CONCURRENCY, len(theme_files)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(generate_week, week_keys, theme_file_paths))  # All the pulses we create
     
     # Count how many were successful and how many were skipped
     successful = len([r for r in results if 'error' not in r])
@@ -143,8 +164,7 @@ def generate_pulse_for_week(week_key: str) -> Dict[str, Any]:
         }
     
     # Load theme data
-    with open(theme_file, 'r', encoding='utf-8') as f:
-        theme_data = json.load(f)
+    theme_data = json_utils.load_file(theme_file)
     
     # Generate pulse
     generator = WeeklyPulseGenerator()
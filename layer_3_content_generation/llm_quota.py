@@ -0,0 +1,27 @@
+"""
+Request/token quota for layer-3 LLM calls
+
+Pulses for several weeks are generated at the same time (WEEK_CONCURRENCY),
+so the summarizer and assembler calls of all of them share one RateLimiter
+sized to the API quotas, instead of each pausing a fixed delay on its own.
+"""
+from config.settings import settings
+from utils.rate_limiter import RateLimiter
+
+# Rough token accounting: ~4 characters per prompt token, plus room for the
+# response (summaries and pulses are a few hundred words at most)
+_CHARS_PER_TOKEN = 4
+_RESPONSE_TOKENS = 1000
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Create a limiter for the LLM request and token quotas"""
+    return RateLimiter(
+        settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    )
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Estimate the tokens one request uses (prompt + response)"""
+    return len(prompt) // _CHARS_PER_TOKEN + _RESPONSE_TOKENS
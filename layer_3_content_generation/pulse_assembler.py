@@ -9,8 +9,10 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from utils.llm_client import LLMClient
+from utils.rate_limiter import RateLimiter, retry_after_seconds
 from config.settings import settings
 from utils.logger import get_logger
+from layer_3_content_generation.llm_quota import create_rate_limiter, estimate_tokens
 
 logger = get_logger(__name__)
 
@@ -20,14 +22,25 @@ MAX_WORD_COUNT = 250
 class PulseAssembler:
     """Assemble weekly pulse from theme summaries"""
     
-    def __init__(self, llm_client: Optional[LLMClient] = None):
+    def __init__(self, llm_client: Optional[LLMClient] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize pulse assembler
         
         Args:
             llm_client: LLM client instance (creates new one if not provided)
+            rate_limiter: Request/token quota limiter, shared with the other
+                layer-3 LLM calls (creates new one if not provided)
         """
         self.llm_client = llm_client or LLMClient()
+        self.rate_limiter = rate_limiter or create_rate_limiter()
+    
+    def _generate(self, prompt: str) -> str:
+        """Get an LLM response once the request/token quota allows it"""
+        self.rate_limiter.wait(tokens=estimate_tokens(prompt))
+        raw_response = self.llm_client.generate(prompt)
+        self.rate_limiter.record_success()
+        return raw_response
     
     def assemble_pulse(self, week_key: str, week_start: str, week_end: str,
                       theme_summaries: List[Dict[str, Any]], 
@@ -64,7 +77,7 @@ class PulseAssembler:
         # Generate pulse with retry logic
         for attempt in range(1, max_retries + 1):
             try:
-                raw_response = self.llm_client.generate(prompt)
+                raw_response = self._generate(prompt)
                 pulse = self._parse_pulse_response(raw_response)
                 
                 if pulse:
@@ -83,9 +96,14 @@ class PulseAssembler:
                     "ResourceExhausted" in error_str
                 )
                 
+                retry_after = retry_after_seconds(e) if is_rate_limit else None
+                if is_rate_limit:
+                    # Slow down every week sharing this limiter, not just this one
+                    self.rate_limiter.record_throttled(retry_after=retry_after)
+                
                 if attempt < max_retries:
                     if is_rate_limit:
-                        delay = settings.LLM_RATE_LIMIT_DELAY
+                        delay = settings.LLM_RATE_LIMIT_DELAY if retry_after is None else min(retry_after, settings.LLM_MAX_BACKOFF)
                         logger.warning(f"Rate limit hit (attempt {attempt}/{max_retries}). Waiting {delay}s...")
                     else:
                         delay = settings.LLM_RETRY_DELAY_BASE * (2 ** (attempt - 1))
@@ -288,7 +306,7 @@ Return the same JSON structure with compressed content. Keep all fields but make
 
 Return ONLY valid JSON, no markdown or additional text."""
         
-        raw_response = self.llm_client.generate(prompt)
+        raw_response = self._generate(prompt)
         compressed = self._parse_pulse_response(raw_response)
         
         return compressed or pulse
@@ -9,8 +9,10 @@ from typing import List, Dict, Any, Optional
 from collections import defaultdict
 
 from utils.llm_client import LLMClient
+from utils.rate_limiter import RateLimiter, retry_after_seconds
 from config.settings import settings
 from utils.logger import get_logger
+from layer_3_content_generation.llm_quota import create_rate_limiter, estimate_tokens
 
 logger = get_logger(__name__)
 
@@ -21,14 +23,25 @@ REVIEWS_PER_CHUNK = 30
 class ThemeSummarizer:
     """Summarize reviews per theme using chunked map-reduce approach"""
     
-    def __init__(self, llm_client: Optional[LLMClient] = None):
+    def __init__(self, llm_client: Optional[LLMClient] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize theme summarizer
         
         Args:
             llm_client: LLM client instance (creates new one if not provided)
+            rate_limiter: Request/token quota limiter, shared with the other
+                layer-3 LLM calls (creates new one if not provided)
         """
         self.llm_client = llm_client or LLMClient()
+        self.rate_limiter = rate_limiter or create_rate_limiter()
+    
+    def _generate(self, prompt: str) -> str:
+        """Get an LLM response once the request/token quota allows it"""
+        self.rate_limiter.wait(tokens=estimate_tokens(prompt))
+        raw_response = self.llm_client.generate(prompt)
+        self.rate_limiter.record_success()
+        return raw_response
     
     def summarize_theme(self, theme_name: str, reviews: List[Dict[str, Any]], 
                         max_retries: int = 3) -> Dict[str, Any]:
@@ -84,10 +97,6 @@ class ThemeSummarizer:
             if chunk_result:
                 all_key_points.extend(chunk_result.get('key_points', []))
                 all_candidate_quotes.extend(chunk_result.get('candidate_quotes', []))
-            
-            # Add delay between chunks
-            if chunk_idx < len(chunks):
-                time.sleep(settings.LLM_BATCH_DELAY)
         
         # Deduplicate and limit
         unique_key_points = list(dict.fromkeys(all_key_points))[:10]  # Keep top 10 unique points
@@ -118,7 +127,7 @@ class ThemeSummarizer:
         
         for attempt in range(1, max_retries + 1):
             try:
-                raw_response = self.llm_client.generate(prompt)
+                raw_response = self._generate(prompt)
                 result = self._parse_summarization_response(raw_response, theme_name)
                 
                 if result:
@@ -135,9 +144,14 @@ class ThemeSummarizer:
                     "ResourceExhausted" in error_str
                 )
                 
+                retry_after = retry_after_seconds(e) if is_rate_limit else None
+                if is_rate_limit:
+                    # Slow down every week sharing this limiter, not just this one
+                    self.rate_limiter.record_throttled(retry_after=retry_after)
+                
                 if attempt < max_retries:
                     if is_rate_limit:
-                        delay = settings.LLM_RATE_LIMIT_DELAY
+                        delay = settings.LLM_RATE_LIMIT_DELAY if retry_after is None else min(retry_after, settings.LLM_MAX_BACKOFF)
                         logger.warning(f"Rate limit hit (attempt {attempt}/{max_retries}). Waiting {delay}s...")
                     else:
                         delay = settings.LLM_RETRY_DELAY_BASE * (2 ** (attempt - 1))
@@ -5,14 +5,15 @@ Weekly pulse generator - orchestrates the map-reduce workflow
 3. Map: Summarize reviews per theme
 4. Reduce: Assemble final pulse
 """
-import json
 import os
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from layer_3_content_generation.theme_summarizer import ThemeSummarizer
 from layer_3_content_generation.pulse_assembler import PulseAssembler
+from layer_3_content_generation.llm_quota import create_rate_limiter
 from config.settings import settings
+from utils import json_utils
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -30,11 +31,37 @@ class WeeklyPulseGenerator:
             summarizer: ThemeSummarizer instance (creates new one if not provided)
             assembler: PulseAssembler instance (creates new one if not provided)
         """
-        self.summarizer = summarizer or ThemeSummarizer()
-        self.assembler = assembler or PulseAssembler()
+        # One quota for every LLM call this generator makes, including from
+        # weeks generated at the same time
+        rate_limiter = create_rate_limiter()
+        self.summarizer = summarizer or ThemeSummarizer(rate_limiter=rate_limiter)
+        self.assembler = assembler or PulseAssembler(rate_limiter=rate_limiter)
         self.pulses_dir = os.path.join(settings.DATA_DIR, "pulses")
         os.makedirs(self.pulses_dir, exist_ok=True)
     
+    def load_existing_pulse(self, week_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the pulse already saved for a week
+        
+        Args:
+            week_key: Week key (YYYY-MM-DD)
+        
+        Returns:
+            Pulse data dictionary, or None if there is no saved pulse (or it can't be read)
+        """
+        pulse_file = os.path.join(self.pulses_dir, f"pulse_{week_key}.json")
+        if not os.path.exists(pulse_file):
+            return None
+        
+        logger.info(f"Pulse already exists for week {week_key}, loading existing...")
+        try:
+            existing_pulse = json_utils.load_file(pulse_file)
+            logger.info(f"Loaded existing pulse for week {week_key}")
+            return existing_pulse
+        except Exception as e:
+            logger.warning(f"Error loading existing pulse for week {week_key}, will regenerate: {e}")
+            return None
+    
     def generate_pulse(self, week_key: str, theme_data: Dict[str, Any], 
                        force_regenerate: bool = False) -> Dict[str, Any]:
         """
@@ -49,16 +76,10 @@ class WeeklyPulseGenerator:
             Dictionary with pulse data and metadata
         """
         # Check if pulse already exists
-        pulse_file = os.path.join(self.pulses_dir, f"pulse_{week_key}.json")
-        if not force_regenerate and os.path.exists(pulse_file):
-            logger.info(f"Pulse already exists for week {week_key}, loading existing...")
-            try:
-                with open(pulse_file, 'r', encoding='utf-8') as f:
-                    existing_pulse = json.load(f)
-                logger.info(f"Loaded existing pulse for week {week_key}")
+        if not force_regenerate:
+            existing_pulse = self.load_existing_pulse(week_key)
+            if existing_pulse is not None:
                 return existing_pulse
-            except Exception as e:
-                logger.warning(f"Error loading existing pulse for week {week_key}, will regenerate: {e}")
         
         logger.info(f"Generating weekly pulse for week {week_key}")
         
@@ -180,8 +201,7 @@ class WeeklyPulseGenerator:
         filename = os.path.join(self.pulses_dir, f"pulse_{week_key}.json")
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(pulse_data, f, indent=2, ensure_ascii=False, default=str)
+            json_utils.dump_file(pulse_data, filename, indent=settings.PRETTY_JSON)
             logger.info(f"Saved pulse to {filename}")
         except Exception as e:
             logger.error(f"Error saving pulse to {filename}: {e}", exc_info=True)
@@ -16,6 +16,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from layer_3_content_generation.theme_summarizer import ThemeSummarizer, REVIEWS_PER_CHUNK
 from layer_3_content_generation.pulse_assembler import PulseAssembler, MAX_WORD_COUNT
 from layer_3_content_generation.weekly_pulse_generator import WeeklyPulseGenerator
+from layer_3_content_generation.generate_pulse import generate_all_pulses
 from config.settings import settings
 from utils.logger import get_logger
 
@@ -142,6 +143,24 @@ class TestThemeSummarizer:
                 # Should deduplicate
                 assert len(result["key_points"]) <= 2  # After deduplication
                 assert len(result["candidate_quotes"]) <= 2
+    
+    @patch('layer_3_content_generation.theme_summarizer.time.sleep')
+    def test_rate_limited_chunk_reports_throttle(self, mock_sleep):
+        """Test that LLM calls go through the rate limiter and a 429 slows it down"""
+        with patch('layer_3_content_generation.theme_summarizer.LLMClient'):
+            rate_limiter = Mock()
+            summarizer = ThemeSummarizer(rate_limiter=rate_limiter)
+            summarizer.llm_client.generate.side_effect = [
+                Exception("429 Quota exceeded. Please retry in 3s."),
+                json.dumps({"theme": "Trading Experience", "key_points": ["Point 1"], "candidate_quotes": []}),
+            ]
+            
+            result = summarizer._summarize_chunk("Trading Experience", ["Charts are slow to load"])
+            
+            assert result["key_points"] == ["Point 1"]
+            assert rate_limiter.wait.call_count == 2
+            rate_limiter.record_throttled.assert_called_once_with(retry_after=3.0)
+            mock_sleep.assert_called_once_with(3.0)
 
 
 class TestPulseAssembler:
@@ -302,6 +321,8 @@ class TestWeeklyPulseGenerator:
         generator = WeeklyPulseGenerator()
         assert generator.summarizer is not None
         assert generator.assembler is not None
+        # Both stages count against one quota
+        assert generator.summarizer.rate_limiter is generator.assembler.rate_limiter
     
     def test_group_reviews_by_theme(self):
         """Test grouping reviews by theme"""
@@ -515,6 +536,87 @@ class TestIntegration:
         
         finally:
             shutil.rmtree(temp_dir)
+    
+    def test_generate_all_pulses_in_parallel(self):
+        """Test that weeks generated concurrently keep their order and fail independently"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            weeks = ["2025-12-01", "2025-12-08", "2025-12-15"]
+            for week_key in weeks:
+                with open(os.path.join(temp_dir, f"themes_{week_key}.json"), 'w', encoding='utf-8') as f:
+                    json.dump({"week_start_date": week_key}, f)
+            # Not a week's theme file
+            with open(os.path.join(temp_dir, "themes_backup.json"), 'w', encoding='utf-8') as f:
+                json.dump({}, f)
+            
+            def generate_pulse(week_key, theme_data, force_regenerate=False):
+                if week_key == "2025-12-08":
+                    raise RuntimeError("boom")
+                return {"week_key": week_key, "pulse": {}}
+            
+            with patch.object(settings, 'THEMES_DIR', temp_dir), patch.object(settings, 'WEEK_CONCURRENCY', 3):
+                with patch('layer_3_content_generation.generate_pulse.WeeklyPulseGenerator') as mock_generator:
+                    mock_generator.return_value.load_existing_pulse.return_value = None
+                    mock_generator.return_value.generate_pulse.side_effect = generate_pulse
+                    results = generate_all_pulses()
+            
+            assert [r["week_key"] for r in results] == weeks
+            assert results[1]["error"] == "boom"
+            assert "error" not in results[2]
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_generate_all_pulses_ignores_other_entries(self):
+        """Test that only themes_YYYY-MM-DD.json files in THEMES_DIR are treated as weeks"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            with open(os.path.join(temp_dir, "themes_2025-12-01.json"), 'w', encoding='utf-8') as f:
+                json.dump({"week_start_date": "2025-12-01"}, f)
+            for name in ["themes_2025-12-08.json.bak", "themes_2025-12-8.json", "summary_2025-12-01.json", "notes.txt"]:
+                with open(os.path.join(temp_dir, name), 'w', encoding='utf-8') as f:
+                    f.write("{}")
+            os.makedirs(os.path.join(temp_dir, "themes_2025-12-15.json"))  # A directory, not a file
+            
+            with patch.object(settings, 'THEMES_DIR', temp_dir):
+                with patch('layer_3_content_generation.generate_pulse.WeeklyPulseGenerator') as mock_generator:
+                    mock_generator.return_value.load_existing_pulse.return_value = None
+                    mock_generator.return_value.generate_pulse.side_effect = (
+                        lambda week_key, theme_data, force_regenerate=False: {"week_key": week_key, "pulse": {}}
+                    )
+                    results = generate_all_pulses()
+            
+            assert [r["week_key"] for r in results] == ["2025-12-01"]
+            generate_calls = mock_generator.return_value.generate_pulse.call_args_list
+            assert generate_calls[0][0][1] == {"week_start_date": "2025-12-01"}
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_generate_all_pulses_reuses_existing_pulse(self):
+        """Test that a week with a saved pulse is not regenerated and its theme file is not read"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            themes_dir = os.path.join(temp_dir, "themes")
+            os.makedirs(themes_dir)
+            with open(os.path.join(themes_dir, "themes_2025-12-01.json"), 'w', encoding='utf-8') as f:
+                f.write("not json")  # Would fail if it were loaded
+            
+            with patch.object(settings, 'DATA_DIR', temp_dir), patch.object(settings, 'THEMES_DIR', themes_dir):
+                generator = WeeklyPulseGenerator(summarizer=Mock(), assembler=Mock())
+                generator._save_pulse("2025-12-01", {"week_key": "2025-12-01", "pulse": {"title": "Saved"}})
+                
+                with patch('layer_3_content_generation.generate_pulse.WeeklyPulseGenerator', return_value=generator):
+                    results = generate_all_pulses()
+            
+            assert results == [{"week_key": "2025-12-01", "pulse": {"title": "Saved"}}]
+            generator.summarizer.summarize_theme.assert_not_called()
+        
+        finally:
+            shutil.rmtree(temp_dir)
 
 
 def run_all_tests():
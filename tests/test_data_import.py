@@ -7,20 +7,25 @@ import os
 import json
 import tempfile
 import shutil
+import threading
+import time
+from array import array
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
+from urllib.error import HTTPError
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from layer_1_data_import.scraper import PlayStoreScraper, fetch_all_reviews
-from layer_1_data_import.validator import ReviewValidator, PIIDetector, TextCleaner
-from layer_1_data_import.deduplicator import ReviewDeduplicator
+from layer_1_data_import.validator import ReviewValidator, PIIDetector, TextCleaner, VALIDATION_RULES_VERSION
+from layer_1_data_import.deduplicator import ReviewDeduplicator, _hash_id
 from layer_1_data_import.storage import ReviewStorage
 from layer_1_data_import.import_reviews import import_reviews
 from models.review import Review
 from config.settings import settings
 from utils.logger import get_logger
+from utils.rate_limiter import RateLimiter, retry_after_seconds
 
 logger = get_logger(__name__)
 
@@ -61,6 +66,21 @@ class TestPIIDetector:
         text = "Follow me @username123"
         redacted = PIIDetector.detect_and_redact(text)
         assert "[REDACTED_HANDLE]" in redacted
+    
+    def test_has_pii_matches_individual_patterns(self):
+        """Test that the combined PII scan agrees with the separate patterns"""
+        patterns = [PIIDetector.EMAIL_PATTERN, *PIIDetector.PHONE_PATTERNS,
+                    PIIDetector.ACCOUNT_ID_PATTERN, PIIDetector.USERNAME_PATTERN]
+        texts = [
+            "Great app, works fine",
+            "Mail me at user@example.com",
+            "ORDER number 12345678 failed",
+            "Call 98765 43210",
+            "Ping @support",
+            "Version 2.5 crashed 3 times",
+        ]
+        for text in texts:
+            assert PIIDetector.has_pii(text) == any(p.search(text) for p in patterns)
 
 
 class TestTextCleaner:
@@ -171,6 +191,21 @@ class TestReviewValidator:
         assert processed is not None
         assert "<b>" not in processed["title"]
         assert len(processed["text"].strip()) >= 20
+    
+    def test_check_review_reports_reason(self):
+        """Test that check_review names the filter a review failed"""
+        base = {
+            "review_id": "test_123",
+            "title": "Review",
+            "text": "This is a great app with many features and good user experience",
+            "date": datetime.now(),
+            "platform": "play_store"
+        }
+        assert ReviewValidator.check_review(base)[1] is None
+        assert ReviewValidator.check_review({**base, "title": "Love it 😀"}) == (None, 'emoji')
+        assert ReviewValidator.check_review({**base, "text": base["text"] + " mail me at a@b.com"}) == (None, 'pii')
+        assert ReviewValidator.check_review({**base, "text": "Too short"}) == (None, 'too_short')
+        assert ReviewValidator.check_review({**base, "platform": "web"}) == (None, 'validation_error')
 
 
 class TestReviewDeduplicator:
@@ -220,6 +255,23 @@ class TestReviewDeduplicator:
             
         finally:
             shutil.rmtree(temp_dir)
+    
+    def test_cache_appends_only_new_ids(self):
+        """Test that saving appends new IDs instead of rewriting the cache"""
+        temp_dir = tempfile.mkdtemp()
+        cache_file = os.path.join(temp_dir, "test_cache.bin")
+        
+        try:
+            deduplicator = ReviewDeduplicator(cache_file=cache_file)
+            deduplicator.filter_duplicates([{"review_id": "review_1"}, {"review_id": "review_2"}])
+            deduplicator.filter_duplicates([{"review_id": "review_2"}, {"review_id": "review_3"}])
+            
+            with open(cache_file, 'rb') as f:
+                stored = array('Q', f.read())
+            assert list(stored) == [_hash_id("review_1"), _hash_id("review_2"), _hash_id("review_3")]
+        
+        finally:
+            shutil.rmtree(temp_dir)
 
 
 class TestReviewStorage:
@@ -312,7 +364,148 @@ class TestReviewStorage:
             week_key = storage._get_week_key(review.date)
             loaded = storage.load_week_reviews(week_key)
             assert len(loaded) == 1
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_unchanged_week_file_is_not_revalidated(self):
+        """Test that existing reviews are only re-validated when the week file changed"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            def make_review(review_id):
+                return Review(
+                    review_id=review_id,
+                    title="Test Review",
+                    text="This is a test review",
+                    date=datetime(2024, 1, 1),
+                    platform="app_store"
+                )
+            
+            ReviewStorage(storage_dir=temp_dir).save_reviews([make_review("review_1")])
+            
+            # A new storage instance reads the persisted cache
+            storage = ReviewStorage(storage_dir=temp_dir)
+            with patch.object(ReviewValidator, 'process_review', wraps=ReviewValidator.process_review) as mock_process:
+                storage.save_reviews([make_review("review_2")])
+                assert mock_process.call_count == 0
+                
+                # Add a review to the file outside of ReviewStorage
+                filename = storage._get_filename(storage._get_week_key(datetime(2024, 1, 1)))
+                with open(filename, 'r', encoding='utf-8') as f:
+                    week_data = json.load(f)
+                week_data["reviews"].append({
+                    "review_id": "manual_1",
+                    "text": "This review was added by hand",
+                    "date": "2024-01-01T00:00:00",
+                    "platform": "app_store"
+                })
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(week_data, f)
+                
+                # Only the review without the "_validated" flag is checked again
+                storage.save_reviews([make_review("review_3")])
+                assert mock_process.call_count == 1
+            
+            loaded = storage.load_week_reviews(storage._get_week_key(datetime(2024, 1, 1)))
+            assert [r["review_id"] for r in loaded] == ["review_1", "review_2", "manual_1", "review_3"]
+            assert not any("_validated" in r for r in loaded)
+            
+            with open(filename, 'r', encoding='utf-8') as f:
+                assert all(r["_validated"] == VALIDATION_RULES_VERSION for r in json.load(f)["reviews"])
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_reviews_revalidated_when_rules_change(self):
+        """Test that reviews marked under an older rules version are validated again"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            def make_review(review_id):
+                return Review(
+                    review_id=review_id,
+                    title="Test Review",
+                    text="This is a test review",
+                    date=datetime(2024, 1, 1),
+                    platform="app_store"
+                )
+            
+            ReviewStorage(storage_dir=temp_dir).save_reviews([make_review("review_1")])
+            # Leave the per-review marker as the only record of validation
+            os.remove(os.path.join(temp_dir, ".validated_files.json"))
+            
+            with patch('layer_1_data_import.storage.VALIDATION_RULES_VERSION', VALIDATION_RULES_VERSION + 1), \
+                    patch.object(ReviewValidator, 'process_review', wraps=ReviewValidator.process_review) as mock_process:
+                storage = ReviewStorage(storage_dir=temp_dir)
+                storage.save_reviews([make_review("review_2")])
+                assert mock_process.call_count == 1
+            
+            loaded = storage.load_week_reviews(storage._get_week_key(datetime(2024, 1, 1)))
+            assert [r["review_id"] for r in loaded] == ["review_1", "review_2"]
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_validation_cache_dropped_when_rules_change(self):
+        """Test that week files validated under older rules are not skipped"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            def make_review(review_id):
+                return Review(
+                    review_id=review_id,
+                    title="Test Review",
+                    text="This is a test review",
+                    date=datetime(2024, 1, 1),
+                    platform="app_store"
+                )
+            
+            ReviewStorage(storage_dir=temp_dir).save_reviews([make_review("review_1")])
+            with open(os.path.join(temp_dir, ".validated_files.json"), 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            assert cached["rules_version"] == VALIDATION_RULES_VERSION
+            assert list(cached["files"]) == ["reviews_2024-01-01.json"]
+            
+            with patch('layer_1_data_import.storage.VALIDATION_RULES_VERSION', VALIDATION_RULES_VERSION + 1):
+                storage = ReviewStorage(storage_dir=temp_dir)
+                filename = storage._get_filename("2024-01-01")
+                assert not storage._is_validated(filename)
+                
+                storage.save_reviews([make_review("review_2")])
+                assert storage._is_validated(filename)
             
+            with open(os.path.join(temp_dir, ".validated_files.json"), 'r', encoding='utf-8') as f:
+                assert json.load(f)["rules_version"] == VALIDATION_RULES_VERSION + 1
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_raw_reviews_already_saved_are_skipped(self):
+        """Test that raw reviews saved by an earlier import don't reload their week file"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            raw_reviews = [
+                {"review_id": "raw_1", "text": "First raw review", "date": datetime(2024, 1, 1)},
+                {"review_id": "raw_2", "text": "Second raw review", "date": datetime(2024, 1, 2)},
+            ]
+            with patch.object(settings, 'RAW_REVIEWS_DIR', temp_dir):
+                storage = ReviewStorage(storage_dir=temp_dir)
+                storage.save_raw_reviews(raw_reviews)
+                
+                with patch('layer_1_data_import.storage.json_utils.load_file') as mock_load:
+                    storage.save_raw_reviews(raw_reviews)
+                    assert mock_load.call_count == 0
+                
+                storage.save_raw_reviews(raw_reviews + [
+                    {"review_id": "raw_3", "text": "Third raw review", "date": datetime(2024, 1, 3)}
+                ])
+            
+            with open(os.path.join(temp_dir, "raw_reviews_2024-01-01.json"), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            assert [r["review_id"] for r in saved["reviews"]] == ["raw_1", "raw_2", "raw_3"]
+        
         finally:
             shutil.rmtree(temp_dir)
 
@@ -353,6 +546,154 @@ class TestScrapers:
         assert isinstance(reviews, list)
         if reviews:
             assert reviews[0]["platform"] == "play_store"
+    
+    @patch('layer_1_data_import.scraper.play_reviews')
+    def test_play_store_scraper_follows_pages(self, mock_play_reviews):
+        """Test that every page is fetched in order using the continuation token"""
+        review_time = (datetime.now() - timedelta(days=10)).timestamp() * 1000
+        mock_play_reviews.side_effect = [
+            ([{"content": "First page review text", "at": review_time, "userName": "User1"}], "token_1"),
+            ([{"content": "Second page review text", "at": review_time, "userName": "User2"}], None),
+        ]
+        
+        scraper = PlayStoreScraper("com.nextbillion.groww", "https://play.google.com/store/apps/details?id=com.nextbillion.groww")
+        scraper.rate_limiter = RateLimiter(requests_per_minute=1000, initial_rate=1000, max_rate=1000)
+        reviews = scraper.fetch_reviews(datetime.now() - timedelta(days=30), datetime.now())
+        
+        assert [r["text"] for r in reviews] == ["First page review text", "Second page review text"]
+        tokens = [call.kwargs["continuation_token"] for call in mock_play_reviews.call_args_list]
+        assert tokens == [None, "token_1"]
+    
+    @patch('layer_1_data_import.scraper.play_reviews')
+    def test_play_store_scraper_stops_past_start_date(self, mock_play_reviews):
+        """Test that no further pages are used once a page reaches past start_date"""
+        in_range = (datetime.now() - timedelta(days=10)).timestamp() * 1000
+        too_old = (datetime.now() - timedelta(days=40)).timestamp() * 1000
+        mock_play_reviews.side_effect = [
+            ([
+                {"content": "Review inside the range", "at": in_range, "userName": "User1"},
+                {"content": "Review before the range", "at": too_old, "userName": "User2"},
+            ], "token_1"),
+            ([{"content": "Review on the next page", "at": too_old, "userName": "User3"}], None),
+        ]
+        
+        scraper = PlayStoreScraper("com.nextbillion.groww", "https://play.google.com/store/apps/details?id=com.nextbillion.groww")
+        scraper.rate_limiter = RateLimiter(requests_per_minute=1000, initial_rate=1000, max_rate=1000)
+        reviews = scraper.fetch_reviews(datetime.now() - timedelta(days=30), datetime.now())
+        
+        assert [r["text"] for r in reviews] == ["Review inside the range"]
+    
+    @patch('utils.rate_limiter.time.sleep')
+    @patch('layer_1_data_import.scraper.play_reviews')
+    def test_play_store_scraper_retries_with_retry_after(self, mock_play_reviews, mock_sleep):
+        """Test that a failed page is retried after the Retry-After delay"""
+        http_error = HTTPError("https://play.google.com", 429, "Too Many Requests", {"Retry-After": "7"}, None)
+        try:
+            try:
+                raise http_error
+            except HTTPError:
+                raise RuntimeError("App not found. Status code 429 returned.")
+        except RuntimeError as e:
+            wrapped_error = e
+        review_time = (datetime.now() - timedelta(days=10)).timestamp() * 1000
+        mock_play_reviews.side_effect = [
+            wrapped_error,
+            ([{"content": "Review after retry", "at": review_time, "userName": "User1"}], None),
+        ]
+        
+        scraper = PlayStoreScraper("com.nextbillion.groww", "https://play.google.com/store/apps/details?id=com.nextbillion.groww")
+        reviews = scraper.fetch_reviews(datetime.now() - timedelta(days=30), datetime.now())
+        
+        assert [r["text"] for r in reviews] == ["Review after retry"]
+        assert mock_play_reviews.call_count == 2
+        assert any(6.5 < call.args[0] <= 7 for call in mock_sleep.call_args_list)
+
+
+class TestRateLimiter:
+    """Test adaptive rate limiting for store requests"""
+    
+    def test_aimd_rate_adjustment(self):
+        """Test that the rate grows slowly on success and halves when throttled"""
+        limiter = RateLimiter(requests_per_minute=60, initial_rate=1.0, max_rate=1.15, min_rate=0.3)
+        limiter.record_success()
+        assert abs(limiter.rate - 1.1) < 1e-9
+        limiter.record_success()
+        assert limiter.rate == 1.15  # Capped at max_rate
+        limiter.record_throttled(retry_after=0)
+        assert abs(limiter.rate - 0.575) < 1e-9
+        limiter.record_throttled(retry_after=0)
+        assert limiter.rate == 0.3  # Floored at min_rate
+    
+    @patch('utils.rate_limiter.time.sleep')
+    def test_window_cap(self, mock_sleep):
+        """Test that requests beyond the per-minute cap wait for the window to move"""
+        limiter = RateLimiter(requests_per_minute=2, initial_rate=1000, max_rate=1000)
+        limiter.wait()
+        limiter.wait()
+        assert all(call.args[0] < 1 for call in mock_sleep.call_args_list)
+        limiter.wait()
+        assert mock_sleep.call_args.args[0] > 59
+    
+    @patch('utils.rate_limiter.time.sleep')
+    def test_token_budget(self, mock_sleep):
+        """Test that a request that would exceed the per-minute token budget waits"""
+        limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=100, initial_rate=1000, max_rate=1000)
+        limiter.wait(tokens=60)
+        limiter.wait(tokens=40)
+        assert all(call.args[0] < 1 for call in mock_sleep.call_args_list)
+        limiter.wait(tokens=20)
+        assert mock_sleep.call_args.args[0] > 59
+    
+    @patch('utils.rate_limiter.time.monotonic', return_value=1000.0)
+    def test_window_cap_with_queued_reservations(self, mock_monotonic):
+        """Test that slots reserved ahead of time never put more than the cap in any 60s window"""
+        limiter = RateLimiter(requests_per_minute=5, initial_rate=1000, max_rate=1000)
+        with limiter._lock:
+            send_times = [limiter._reserve(0)[0] for _ in range(17)]
+        
+        for start in send_times:
+            in_window = [t for t in send_times if start <= t < start + RateLimiter.WINDOW_SECONDS]
+            assert len(in_window) <= 5
+        assert send_times[-1] - send_times[0] >= 3 * RateLimiter.WINDOW_SECONDS
+    
+    def test_throttle_while_another_thread_waits(self):
+        """Test that a throttle reported during another thread's wait isn't blocked and delays that thread"""
+        limiter = RateLimiter(requests_per_minute=100, initial_rate=4, max_rate=4)  # 0.25s apart
+        limiter.wait()
+        sent_at = []
+        waiter = threading.Thread(target=lambda: (limiter.wait(), sent_at.append(time.monotonic())))
+        waiter.start()
+        time.sleep(0.05)  # The waiter is now sleeping until its slot
+        
+        throttled_at = time.monotonic()
+        limiter.record_throttled(retry_after=0.5)
+        assert time.monotonic() - throttled_at < 0.1  # Didn't wait for the sleeping thread
+        
+        waiter.join(timeout=5)
+        assert sent_at and sent_at[0] - throttled_at >= 0.5
+    
+    def test_retry_after_from_error_message(self):
+        """Test reading the requested wait from errors that only mention it in the message"""
+        assert retry_after_seconds(Exception("429 Quota exceeded. Please retry in 13.5s.")) == 13.5
+        assert retry_after_seconds(Exception("429 quota\nretry_delay {\n  seconds: 7\n}")) == 7
+        assert retry_after_seconds(Exception("500 Internal error")) is None
+
+
+class TestGeminiConfiguration:
+    """Test the shared Gemini client setup"""
+    
+    def test_gemini_configured_once_per_api_key(self):
+        """Test that new clients don't reconfigure genai (dropping its open connections) for the same key"""
+        from utils import embeddings_client
+        
+        with patch.object(embeddings_client, '_configured_api_key', None), \
+                patch.object(embeddings_client.genai, 'configure') as mock_configure:
+            embeddings_client.configure_gemini("key-1")
+            embeddings_client.GeminiEmbeddingsClient(api_key="key-1")
+            assert mock_configure.call_count == 1
+            
+            embeddings_client.configure_gemini("key-2")
+            assert mock_configure.call_count == 2
 
 
 class TestFullImportWorkflow:
@@ -503,6 +844,8 @@ def run_all_tests():
         ("Review Deduplicator", TestReviewDeduplicator),
         ("Review Storage", TestReviewStorage),
         ("Scrapers", TestScrapers),
+        ("Rate Limiter", TestRateLimiter),
+        ("Gemini Configuration", TestGeminiConfiguration),
         ("Full Import Workflow", TestFullImportWorkflow),
     ]
     
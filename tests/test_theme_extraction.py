@@ -7,7 +7,10 @@ import os
 import json
 import tempfile
 import shutil
+import threading
+import time
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch, MagicMock
 
 # Add parent directory to path
@@ -25,17 +28,38 @@ from layer_2_theme_extraction.theme_config import (
 from layer_2_theme_extraction.classifier import (
     ReviewClassifier,
     aggregate_theme_counts,
+    get_top_themes,
     get_top_themes_by_count,
     REVIEWS_PER_BATCH
 )
+from layer_2_theme_extraction.fast_rules import match_fast_rule
 from layer_2_theme_extraction.weekly_processor import WeeklyThemeProcessor
+from utils.spam_filter import is_spam
 from layer_1_data_import.storage import ReviewStorage
 from config.settings import settings
+from utils import json_utils
+from utils.llm_cache import SQLiteCache
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class NoClassificationCache:
+    """
+    Turns the on-disk classification cache off for each test
+    
+    Tests build their own classifier results; don't let earlier tests (or
+    runs) answer them from the cache
+    """
+    
+    def setup_method(self, method=None):
+        self._cache_setting = patch.object(settings, 'LLM_CACHE_ENABLED', False)
+        self._cache_setting.start()
+    
+    def teardown_method(self, method=None):
+        self._cache_setting.stop()
+
+
 class TestThemeConfig:
     """Test theme configuration"""
     
@@ -89,7 +113,7 @@ class TestThemeConfig:
         assert isinstance(MIN_REVIEW_LENGTH, int)
 
 
-class TestReviewClassifier:
+class TestReviewClassifier(NoClassificationCache):
     """Test review classifier with mocked LLM"""
     
     def test_classifier_initialization(self):
@@ -202,6 +226,8 @@ class TestReviewClassifier:
         assert top_themes[0][1] == 3
         assert top_themes[1][0] == "Theme B"
         assert top_themes[1][1] == 2
+        # Same result from counts that were already aggregated
+        assert get_top_themes(aggregate_theme_counts(classifications), max_themes=2) == top_themes
     
     def test_parse_llm_response_json(self):
         """Test parsing JSON response from LLM"""
@@ -234,6 +260,165 @@ class TestReviewClassifier:
             assert parsed[1]["review_id"] == "review_2"
             assert parsed[1]["chosen_theme"] == "App Performance & Reliability"
     
+    def test_parse_llm_response_markdown(self):
+        """Test extracting the JSON array from a code block or a truncated response"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            reviews = [{"review_id": "review_1", "text": "This is a test review with enough characters"}]
+            array = json.dumps([
+                {"review_id": "review_1", "chosen_theme": "Trading Experience", "short_reason": "Says [charts] lag]"}
+            ])
+            
+            parsed = classifier._parse_llm_response(f"Here you go:\n```json\n{array}\n```\nDone [1]", reviews)
+            assert parsed[0]["short_reason"] == "Says [charts] lag]"
+            
+            # Cut off mid-array: falls back to line-based parsing instead of failing
+            assert classifier._parse_llm_response(f"```json\n{array[:40]}", reviews) == []
+    
+    def test_compact_prompt_and_response(self):
+        """Test that reviews are sent by number and compact answers map back to them"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            reviews = [
+                {"review_id": "review_1", "text": "Charts take forever to load " + "x" * 500},
+                {"review_id": "review_2", "title": "Payments", "text": "Withdrawal stuck for days"},
+            ]
+            
+            prompt = classifier._build_classification_prompt(reviews)
+            assert "review_1" not in prompt
+            assert '"x":"Payments: Withdrawal stuck for days"' in prompt
+            assert "x" * 500 not in prompt  # Long reviews are cut short
+            
+            theme_2 = classifier.themes[1]
+            response = json.dumps([
+                {"i": 1, "t": 1, "r": "Slow charts"},
+                {"i": "2", "t": "2", "r": "Stuck withdrawal"},
+                {"i": 9, "t": 1, "r": "Not in this batch"},
+                {"i": 0, "t": 1, "r": "Not in this batch either"},
+            ])
+            parsed = classifier._parse_llm_response(response, reviews)
+            
+            assert parsed[0] == {"review_id": "review_1", "chosen_theme": classifier.themes[0], "short_reason": "Slow charts"}
+            assert parsed[1] == {"review_id": "review_2", "chosen_theme": theme_2, "short_reason": "Stuck withdrawal"}
+            assert "review_id" not in parsed[2]
+            assert "review_id" not in parsed[3]
+    
+    def test_parse_line_based_response(self):
+        """Test the fallback parser for responses that aren't JSON"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            text = (
+                "Review ID: review_1\n"
+                "Chosen_theme: payments, upi & settlements\n"
+                "Reason: Withdrawal was stuck\n"
+                "Paid money but no theme here\n"
+                "review_id: review_2\n"
+                "Theme: Trading Experience\n"
+                "short_reason: Charts are slow\n"
+            )
+            
+            parsed = classifier._parse_line_based_response(text, [])
+            
+            assert parsed == [
+                {"review_id": "review_1", "chosen_theme": "Payments, UPI & Settlements", "short_reason": "Withdrawal was stuck",
+                 "parsed_from_text": True},
+                {"review_id": "review_2", "chosen_theme": "Trading Experience", "short_reason": "Charts are slow",
+                 "parsed_from_text": True},
+            ]
+            
+            # Compact answers, one per line
+            reviews = [{"review_id": "review_1"}, {"review_id": "review_2"}]
+            text = '{"i": 1, "t": 1, "r": "Slow charts"},\ni: 2, t: 3, r: Stuck withdrawal\n{"i": 2, "t'
+            
+            parsed = classifier._parse_line_based_response(text, reviews)
+            
+            assert parsed == [
+                {"review_id": "review_1", "chosen_theme": classifier.themes[0], "short_reason": "Slow charts",
+                 "parsed_from_text": True},
+                {"review_id": "review_2", "chosen_theme": classifier.themes[2], "short_reason": "Stuck withdrawal",
+                 "parsed_from_text": True},
+            ]
+    
+    def test_truncated_response_salvaged_and_rest_resent(self):
+        """Test that complete entries of a cut-off response are kept and the missing reviews are sent again"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cache = SQLiteCache(os.path.join(temp_dir, "classifier.sqlite"))
+            reviews = [
+                {"review_id": f"review_{i}", "text": f"This is review {i} with enough characters"}
+                for i in range(1, 4)
+            ]
+            
+            with patch('layer_2_theme_extraction.classifier.LLMClient'):
+                classifier = ReviewClassifier(cache=cache)
+                truncated = json.dumps([
+                    {"i": 1, "t": 1, "r": "First"},
+                    {"i": 2, "t": 2, "r": "Second"},
+                    {"i": 3, "t": 3, "r": "Third"},
+                ])[:-30]
+                classifier.llm_client.generate.side_effect = [
+                    truncated,
+                    json.dumps([{"i": 1, "t": 3, "r": "Third"}]),
+                ]
+                
+                assert len(classifier._parse_llm_response(truncated, reviews)) == 2
+                result = classifier._classify_batch_with_retry(reviews, "test_batch_1")
+            
+            assert {c["review_id"]: c["chosen_theme"] for c in result} == {
+                "review_1": classifier.themes[0],
+                "review_2": classifier.themes[1],
+                "review_3": classifier.themes[2],
+            }
+            # The follow-up request only carried the missing review
+            follow_up = classifier.llm_client.generate.call_args_list[1][0][0]
+            assert "review 3 " in follow_up and "review 1 " not in follow_up
+            assert len(cache.get_many(classifier._cache_key(review) for review in reviews)) == 3
+            cache.close()
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    @patch('layer_2_theme_extraction.classifier.time.sleep')
+    def test_invalid_theme_gets_fallback_without_resend(self, mock_sleep):
+        """Test that an answered review with an unknown theme gets the fallback instead of a retry"""
+        reviews = [
+            {"review_id": f"review_{i}", "text": f"This is review {i} with enough characters"}
+            for i in range(1, 3)
+        ]
+        
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            classifier.llm_client.generate.return_value = json.dumps([
+                {"i": 1, "t": 1, "r": "Slow charts"},
+                {"i": 2, "t": "Other", "r": "Not sure"},
+            ])
+            result = classifier._classify_batch_with_retry(reviews, "test_batch_1")
+        
+        assert classifier.llm_client.generate.call_count == 1
+        assert result[0]["chosen_theme"] == classifier.themes[0]
+        assert result[1]["chosen_theme"] == classifier.fallback_theme
+        assert result[1]["short_reason"].startswith("Fallback applied")
+    
+    def test_line_parsed_classifications_not_cached(self):
+        """Test that answers recovered from a malformed response are used but not cached"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cache = SQLiteCache(os.path.join(temp_dir, "classifier.sqlite"))
+            reviews = [{"review_id": "review_1", "text": "This is a test review with enough characters"}]
+            
+            with patch('layer_2_theme_extraction.classifier.LLMClient'):
+                classifier = ReviewClassifier(cache=cache)
+                classifier.llm_client.generate.return_value = "i: 1, t: 1, r: Slow charts"
+                result = classifier._classify_batch_with_retry(reviews, "test_batch_1")
+            
+            assert result[0]["chosen_theme"] == classifier.themes[0]
+            assert cache.get(classifier._cache_key(reviews[0])) is None
+            cache.close()
+        finally:
+            shutil.rmtree(temp_dir)
+    
     def test_validate_classifications(self):
         """Test classification validation and guardrails"""
         with patch('layer_2_theme_extraction.classifier.LLMClient'):
@@ -265,7 +450,7 @@ class TestReviewClassifier:
             assert validated[1]["chosen_theme"] == "Trading Experience"
 
 
-class TestWeeklyThemeProcessor:
+class TestWeeklyThemeProcessor(NoClassificationCache):
     """Test weekly theme processor"""
     
     def test_process_week(self):
@@ -362,6 +547,59 @@ class TestWeeklyThemeProcessor:
         finally:
             shutil.rmtree(temp_dir)
     
+    def test_process_all_weeks_in_parallel(self):
+        """Test that weeks processed concurrently keep their order and fail independently"""
+        storage = Mock()
+        storage.get_available_weeks.return_value = ["2024-01-01", "2024-01-08", "2024-01-15"]
+        processor = WeeklyThemeProcessor(storage=storage, classifier=Mock())
+        
+        def process_week(week_key, force_regenerate=False):
+            if week_key == "2024-01-08":
+                raise RuntimeError("boom")
+            # Earlier weeks finish last
+            time.sleep(0.05 if week_key == "2024-01-01" else 0)
+            return {"week_key": week_key, "total_reviews": 1, "classified_reviews": 1}
+        
+        with patch.object(settings, 'WEEK_CONCURRENCY', 3):
+            with patch.object(processor, 'process_week', side_effect=process_week):
+                results = processor.process_all_weeks()
+        
+        assert [r["week_key"] for r in results] == ["2024-01-01", "2024-01-08", "2024-01-15"]
+        assert results[1]["error"] == "boom"
+        assert "error" not in results[2]
+    
+    def test_spam_reviews_are_filtered(self):
+        """Test the spam checks used to drop junk reviews before classification"""
+        assert is_spam("!!!!!!!!!!!!!!!!!!!!!!!!")
+        assert is_spam("goooooooooooooooooooooooooooooood")
+        assert is_spam(" ".join(["nice"] * 8 + ["app"] * 8))
+        assert not is_spam("App is sooooo slow when the market opens")
+        assert not is_spam("Withdrawal took three days to reach my bank account")
+    
+    def test_skip_existing_week_reads_summary(self):
+        """Test that skipping an already processed week loads the summary file, not the reviews"""
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            with patch.object(settings, 'THEMES_DIR', temp_dir):
+                processor = WeeklyThemeProcessor(classifier=Mock())
+                reviews = [{"review_id": "review_1", "text": "Review 1", "theme": "Trading Experience"}]
+                processor._save_theme_assignments("2025-12-01", reviews, {"Trading Experience": 1}, [("Trading Experience", 1)])
+                
+                summary = json_utils.load_file(os.path.join(temp_dir, "summary_2025-12-01.json"))
+                assert "reviews" not in summary
+                assert summary["week_end_date"] == "2025-12-07"
+                
+                with patch('layer_2_theme_extraction.weekly_processor.json_utils.load_file', wraps=json_utils.load_file) as load_file:
+                    result = processor.process_week("2025-12-01")
+                
+                assert result["skipped"] is True
+                assert result["theme_counts"] == {"Trading Experience": 1}
+                load_file.assert_called_once_with(os.path.join(temp_dir, "summary_2025-12-01.json"))
+        
+        finally:
+            shutil.rmtree(temp_dir)
+    
     def test_enrich_reviews_with_themes(self):
         """Test enriching reviews with theme assignments"""
         temp_dir = tempfile.mkdtemp()
@@ -395,7 +633,7 @@ class TestWeeklyThemeProcessor:
             shutil.rmtree(temp_dir)
 
 
-class TestBatchingAndRetry:
+class TestBatchingAndRetry(NoClassificationCache):
     """Test batching and retry logic"""
     
     def test_reviews_per_batch_constant(self):
@@ -434,6 +672,217 @@ class TestBatchingAndRetry:
                 assert len(call_args_list[0][0][0]) == 100  # First batch: 100 reviews
                 assert len(call_args_list[1][0][0]) == 100  # Second batch: 100 reviews
                 assert len(call_args_list[2][0][0]) == 50   # Third batch: 50 reviews
+    
+    def test_concurrent_batches_keep_order(self):
+        """Test that batches classified in parallel come back in batch order"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            reviews = [
+                {"review_id": f"review_{i}", "text": f"This is review {i} with enough characters"}
+                for i in range(250)
+            ]
+            
+            def classify(batch_reviews, batch_label):
+                # Later batches finish first
+                time.sleep(0.05 * (3 - int(batch_label.rsplit('_', 1)[1])))
+                return [
+                    {"review_id": r["review_id"], "chosen_theme": "Trading Experience", "short_reason": "Test"}
+                    for r in batch_reviews
+                ]
+            
+            with patch.object(settings, 'LLM_CONCURRENCY', 3):
+                with patch.object(classifier, '_classify_batch_with_retry', side_effect=classify):
+                    result = classifier.classify_batch(reviews, "test")
+            
+            assert [r["review_id"] for r in result] == [r["review_id"] for r in reviews]
+    
+    def test_in_flight_requests_capped_across_weeks(self):
+        """Test that concurrent classify_batch calls share the LLM_CONCURRENCY cap"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def generate(prompt, max_output_tokens=None):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            return json.dumps([{"i": i, "t": 1, "r": "Test"} for i in range(1, prompt.count('{"i":') + 1)])
+        
+        with patch('layer_2_theme_extraction.classifier.LLMClient'), patch.object(settings, 'LLM_CONCURRENCY', 2):
+            classifier = ReviewClassifier()
+            classifier.rate_limiter = Mock()
+            classifier.llm_client.generate.side_effect = generate
+            
+            def classify_week(week):
+                reviews = [
+                    {"review_id": f"{week}_{i}", "text": f"Week {week} review {i} with enough characters"}
+                    for i in range(REVIEWS_PER_BATCH * 3)
+                ]
+                return classifier.classify_batch(reviews, f"week_{week}")
+            
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                results = list(executor.map(classify_week, range(3)))
+        
+        assert all(len(result) == REVIEWS_PER_BATCH * 3 for result in results)
+        assert max(peak) == 2
+    
+    @patch('layer_2_theme_extraction.classifier.time.sleep')
+    def test_rate_limit_retry_waits_with_jitter(self, mock_sleep):
+        """Test that a rate-limited batch is retried after at least LLM_RATE_LIMIT_DELAY"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            reviews = [{"review_id": "review_1", "text": "This is a test review with enough characters"}]
+            classifier.llm_client.generate.side_effect = [
+                Exception("429 Resource has been exhausted (e.g. check quota)"),
+                json.dumps([{"review_id": "review_1", "chosen_theme": "Trading Experience", "short_reason": "Test"}]),
+            ]
+            
+            result = classifier._classify_batch_with_retry(reviews, "test_batch_1")
+            
+            assert result[0]["chosen_theme"] == "Trading Experience"
+            retry_delays = [call.args[0] for call in mock_sleep.call_args_list]
+            assert settings.LLM_RATE_LIMIT_DELAY <= max(retry_delays) <= settings.LLM_MAX_BACKOFF
+    
+    def test_cached_classifications_are_not_resent(self):
+        """Test that reviews classified on an earlier run are answered from the cache"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cache = SQLiteCache(os.path.join(temp_dir, "classifier.sqlite"))
+            reviews = [
+                {"review_id": f"review_{i}", "text": f"This is review {i} with enough characters"}
+                for i in range(3)
+            ]
+            
+            with patch('layer_2_theme_extraction.classifier.LLMClient'):
+                classifier = ReviewClassifier(cache=cache)
+                classifier.llm_client.generate.return_value = json.dumps([
+                    {"review_id": "review_0", "chosen_theme": "Trading Experience", "short_reason": "Test"},
+                    {"review_id": "review_1", "chosen_theme": "Support & Service Quality", "short_reason": "Test"},
+                ])
+                first = classifier.classify_batch(reviews[:2], "first")
+                
+                classifier.llm_client.generate.return_value = json.dumps([
+                    {"review_id": "review_2", "chosen_theme": "Support & Service Quality", "short_reason": "Test"},
+                ])
+                second = classifier.classify_batch(reviews, "second")
+            
+            assert [c["chosen_theme"] for c in first] == ["Trading Experience", "Support & Service Quality"]
+            # Only the new review was sent the second time
+            assert "review 2 " in classifier.llm_client.generate.call_args[0][0]
+            assert "review 0 " not in classifier.llm_client.generate.call_args[0][0]
+            assert {c["review_id"]: c["chosen_theme"] for c in second} == {
+                "review_0": "Trading Experience",
+                "review_1": "Support & Service Quality",
+                "review_2": "Support & Service Quality",
+            }
+            cache.close()
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_duplicate_reviews_sent_once(self):
+        """Test that reviews with identical text are classified with one entry in the prompt"""
+        reviews = [
+            {"review_id": "review_0", "text": "Good app for beginners to learn"},
+            {"review_id": "review_1", "text": "Good app for beginners to learn "},
+            {"review_id": "review_2", "text": "Good app for beginners to learn"},
+        ]
+        
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            classifier.llm_client.generate.return_value = json.dumps([
+                {"i": 1, "t": 1, "r": "Beginner friendly"},
+            ])
+            classifications = classifier.classify_batch(reviews, "test")
+        
+        prompt = classifier.llm_client.generate.call_args[0][0]
+        assert prompt.count("Good app for beginners") == 1
+        assert sorted(c["review_id"] for c in classifications) == ["review_0", "review_1", "review_2"]
+        assert {c["chosen_theme"] for c in classifications} == {"Trading Experience"}
+    
+    def test_default_cache_reused_by_next_run(self):
+        """Test that with the cache enabled, a new classifier (a later run) reuses the SQLite cache in CACHE_DIR"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            reviews = [{"review_id": "review_1", "text": "This is a test review with enough characters"}]
+            
+            with patch.object(settings, 'LLM_CACHE_ENABLED', True), patch.object(settings, 'CACHE_DIR', temp_dir):
+                with patch('layer_2_theme_extraction.classifier.LLMClient'):
+                    first_run = ReviewClassifier()
+                    first_run.llm_client.generate.return_value = json.dumps([{"i": 1, "t": 1, "r": "Test"}])
+                    first = first_run.classify_batch(reviews, "first")
+                    first_run.cache.close()
+                    
+                    second_run = ReviewClassifier()
+                    second = second_run.classify_batch(reviews, "second")
+                    second_run.cache.close()
+            
+            assert os.path.exists(os.path.join(temp_dir, "classifier.sqlite"))
+            assert first == second
+            assert first[0]["chosen_theme"] == second_run.themes[0]
+            # Both runs share the mocked client: only the first one asked the LLM
+            assert second_run.llm_client.generate.call_count == 1
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_trivial_reviews_bypass_llm(self):
+        """Test that short reviews matching one keyword rule are classified without the LLM"""
+        assert match_fast_rule("App keeps crashing on startup")[0] == "App Performance & Reliability"
+        assert match_fast_rule("Withdrawal pending for 3 days") == ("Payments, UPI & Settlements", "withdrawal")
+        # Rules for two themes match: leave it to the LLM
+        assert match_fast_rule("App crashed while my withdrawal was pending") is None
+        assert match_fast_rule("Crashes " + "and more details about the problem " * 3) is None
+        
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            
+            reviews = [
+                {"review_id": "review_1", "text": "App keeps crashing on startup"},
+                {"review_id": "review_2", "text": "This is a test review with enough characters"},
+            ]
+            
+            with patch.object(classifier, '_classify_batch_with_retry') as mock_retry:
+                mock_retry.return_value = [
+                    {"review_id": "review_2", "chosen_theme": "Trading Experience", "short_reason": "Test"}
+                ]
+                result = classifier.classify_batch(reviews, "test")
+            
+            # Only the unmatched review was sent
+            assert [r["review_id"] for r in mock_retry.call_args[0][0]] == ["review_2"]
+            assert {c["review_id"]: c["chosen_theme"] for c in result} == {
+                "review_1": "App Performance & Reliability",
+                "review_2": "Trading Experience",
+            }
+    
+    @patch('layer_2_theme_extraction.classifier.time.sleep')
+    def test_circuit_breaker_skips_llm_after_repeated_failures(self, mock_sleep):
+        """Test that once CIRCUIT_BREAK_AT batches fail every retry, later batches skip the LLM"""
+        with patch('layer_2_theme_extraction.classifier.LLMClient'):
+            classifier = ReviewClassifier()
+            classifier.llm_client.generate.side_effect = Exception("503 Service Unavailable")
+            
+            reviews = [
+                {"review_id": f"review_{i}", "text": f"This is review {i} with enough characters"}
+                for i in range(REVIEWS_PER_BATCH * 5)
+            ]
+            
+            with patch.object(settings, 'LLM_CONCURRENCY', 1):
+                result = classifier.classify_batch(reviews, "test")
+            
+            assert len(result) == len(reviews)
+            assert all(r["chosen_theme"] == get_fallback_theme() for r in result)
+            # Only the first CIRCUIT_BREAK_AT batches were sent (with all their retries)
+            expected_calls = ReviewClassifier.CIRCUIT_BREAK_AT * settings.LLM_RETRY_ATTEMPTS
+            assert classifier.llm_client.generate.call_count == expected_calls
+            
+            # After the cooldown the LLM is tried again
+            with patch.object(settings, 'LLM_CIRCUIT_COOLDOWN', 0):
+                classifier._classify_batch_with_retry(reviews[:1], "test_retry")
+            assert classifier.llm_client.generate.call_count > expected_calls
 
 
 def run_all_tests():
@@ -464,6 +913,8 @@ def run_all_tests():
         for test_method in test_methods:
             total_tests += 1
             test_func = getattr(test_instance, test_method)
+            if hasattr(test_instance, 'setup_method'):
+                test_instance.setup_method(test_func)
             try:
                 test_func()
                 print(f"  ✅ {test_method}")
@@ -472,6 +923,9 @@ def run_all_tests():
                 print(f"  ❌ {test_method}: {e}")
                 failed_tests.append((suite_name, test_method, str(e)))
                 logger.error(f"Test failed: {suite_name}.{test_method}: {e}", exc_info=True)
+            finally:
+                if hasattr(test_instance, 'teardown_method'):
+                    test_instance.teardown_method(test_func)
     
     # Summary
     print(f"\n{'=' * 80}")
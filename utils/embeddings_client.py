@@ -3,6 +3,7 @@ Embeddings client wrapper for Gemini embeddings.
 """
 from __future__ import annotations
 
+import threading
 import time
 from typing import Iterable, List, Sequence, Dict, Any
 
@@ -13,6 +14,21 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# API key genai was last configured with. genai.configure() throws away the
+# library's cached API clients (and their open connections), so it's only
+# called again when the key actually changes.
+_configured_api_key: str | None = None
+_configure_lock = threading.Lock()
+
+
+def configure_gemini(api_key: str) -> None:
+    """Configure the genai library for api_key, unless it already is."""
+    global _configured_api_key
+    with _configure_lock:
+        if api_key != _configured_api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+
 
 class GeminiEmbeddingsClient:
     """
@@ -34,7 +50,7 @@ class GeminiEmbeddingsClient:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is not set; cannot generate embeddings.")
 
-        genai.configure(api_key=self.api_key)
+        configure_gemini(self.api_key)
 
         self.model = model or settings.GEMINI_EMBEDDING_MODEL
         self.batch_size = max(1, batch_size)
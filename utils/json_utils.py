@@ -0,0 +1,87 @@
+"""
+Fast JSON encoding/decoding helpers.
+
+Uses orjson (Rust, SIMD-accelerated) when it is installed and falls back to
+the standard library json module otherwise. Both paths work on bytes so
+files can be read and written in binary mode without an extra decode step.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import tempfile
+from typing import Any
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - executed only when orjson missing
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Both libraries raise a ValueError subclass on malformed input
+JSONDecodeError = ValueError
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON from bytes or str."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes.
+
+    Non-JSON values (e.g. datetimes) are converted with str() on the stdlib
+    path; orjson writes datetimes natively in ISO 8601 format.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def load_file(path: str) -> Any:
+    """
+    Read and parse a JSON file.
+
+    With orjson the file is memory-mapped and parsed in place, so a large
+    week file isn't first copied into a bytes object the size of the file.
+    """
+    with open(path, "rb") as f:
+        if ORJSON_AVAILABLE:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file: nothing to map
+                return orjson.loads(b"")
+            with mapped, memoryview(mapped) as view:
+                return orjson.loads(view)
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str, indent: bool = False) -> None:
+    """
+    Serialize obj and write it to path.
+
+    The data goes to a temporary file next to path that then replaces it,
+    so readers (and concurrent writers) never see a half-written file.
+    """
+    data = dumps(obj, indent=indent)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix="." + os.path.basename(path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
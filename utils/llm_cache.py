@@ -0,0 +1,105 @@
+"""
+Persistent cache for LLM results
+
+SQLiteCache is a small key/value store on disk, used to skip LLM requests
+whose answer is already known (e.g. classifying a review that was already
+classified with the same model and themes on an earlier run). Values are
+stored as JSON; once the cache holds max_entries, the oldest entries are
+dropped.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from utils import json_utils
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite limits how many ? parameters one statement may have
+_MAX_QUERY_PARAMS = 500
+
+
+class SQLiteCache:
+    """Key/value cache stored in a SQLite file (thread-safe)"""
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        """
+        Initialize cache
+
+        Args:
+            path: SQLite database file (created if missing)
+            max_entries: Most entries to keep; the oldest are dropped beyond this
+        """
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One connection shared by every thread, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the value stored under key, or None"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys at once
+
+        Returns:
+            Dictionary of the keys that were found and their values
+        """
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _MAX_QUERY_PARAMS):
+                chunk = keys[i:i + _MAX_QUERY_PARAMS]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for key, value in rows:
+                    found[key] = json_utils.loads(value)
+        return found
+
+    def set(self, key: str, value: Any):
+        """Store value under key"""
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, Any]):
+        """Store several values in one transaction"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json_utils.dumps(value), now) for key, value in items.items()]
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                        rows,
+                    )
+                    excess = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        self._conn.execute(
+                            "DELETE FROM cache WHERE key IN ("
+                            "SELECT key FROM cache ORDER BY created_at LIMIT ?)",
+                            (excess,),
+                        )
+            except sqlite3.Error as e:
+                # A cache that can't be written only costs repeated requests
+                logger.warning(f"Error writing LLM cache {self.path}: {e}")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -20,7 +20,7 @@ except ImportError:  # pragma: no cover - executed only when hdbscan missing
     from sklearn.cluster import DBSCAN
 
 from config.settings import settings
-from utils.embeddings_client import GeminiEmbeddingsClient
+from utils.embeddings_client import GeminiEmbeddingsClient, configure_gemini
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -39,7 +39,8 @@ class LLMClient:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is not set; cannot initialize LLM client.")
 
-        genai.configure(api_key=self.api_key)
+        # Reuses the library's API connection when the key hasn't changed
+        configure_gemini(self.api_key)
 
         self.model_name = model or settings.GEMINI_MODEL
         self.generation_config = generation_config or {
@@ -58,9 +59,14 @@ class LLMClient:
             metadata={"hnsw:space": "cosine"},
         )
 
-    def generate(self, prompt: str) -> str:
-        """Generate raw text from the Gemini model."""
-        response = self.model.generate_content(prompt)
+    def generate(self, prompt: str, max_output_tokens: int | None = None) -> str:
+        """Generate raw text from the Gemini model, optionally capping the response length."""
+        if max_output_tokens is not None:
+            response = self.model.generate_content(
+                prompt, generation_config={"max_output_tokens": max_output_tokens}
+            )
+        else:
+            response = self.model.generate_content(prompt)
         return getattr(response, "text", "") or ""
 
     def classify_reviews(
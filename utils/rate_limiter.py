@@ -0,0 +1,188 @@
+"""
+Adaptive client-side rate limiting
+
+RateLimiter spaces out requests to an external service. It combines a
+sliding one-minute window (never more than requests_per_minute requests,
+and optionally never more than tokens_per_minute tokens) with an AIMD
+request rate: the rate grows a little after every successful
+request and is halved whenever the service pushes back, so the client
+settles just below the point where it gets throttled instead of sleeping a
+fixed amount between requests.
+
+retry_after_seconds() digs the wait a service asked for out of the
+exception a failed request raised.
+"""
+import re
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+# How long the service asked us to wait, when it's only given in the error
+# message (Gemini: "Please retry in 13.5s." / "retry_delay { seconds: 13 }")
+_RETRY_IN_PATTERN = re.compile(r'retry in (\d+(?:\.\d+)?)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE)
+
+
+class RateLimiter:
+    """Sliding-window + AIMD rate limiter (thread-safe)"""
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: Optional[int] = None,
+        initial_rate: float = 1.0,
+        max_rate: float = 2.0,
+        min_rate: float = 0.1,
+        increase_step: float = 0.1,
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            requests_per_minute: Hard cap on requests in any 60 second window
+            tokens_per_minute: Hard cap on tokens (as passed to wait()) in any
+                60 second window; None for no token limit
+            initial_rate: Starting request rate (requests per second)
+            max_rate: Highest rate the additive increase can reach
+            min_rate: Lowest rate the multiplicative decrease can reach
+            increase_step: How much the rate grows after each success
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.rate = initial_rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self._sent = deque()  # (time, tokens) of requests in the current window, incl. reserved ones
+        self._tokens_in_window = 0
+        self._not_before = 0.0  # Earliest time the next request may go out
+        self._throttled_until = 0.0  # End of the latest backoff the service asked for
+        self._lock = threading.Lock()
+
+    def wait(self, tokens: int = 0):
+        """
+        Block until the next request is allowed, then record it
+
+        The caller's send time is reserved under the lock, but the sleep
+        happens without it, so other threads can reserve later slots and
+        report results in the meantime. If a throttle arrives during the
+        sleep, the slot is given up and a new one is taken after the backoff.
+
+        Args:
+            tokens: Estimated tokens the request will use (counted against
+                tokens_per_minute)
+        """
+        with self._lock:
+            slot = self._reserve(tokens)
+        while True:
+            delay = slot[0] - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._lock:
+                if self._throttled_until <= slot[0]:
+                    return
+                # Throttled while waiting: queue again behind the backoff
+                self._release(slot)
+                slot = self._reserve(tokens)
+
+    def _reserve(self, tokens: int) -> Tuple[float, int]:
+        """Record the earliest allowed send time for a request (lock must be held)"""
+        now = time.monotonic()
+        # Drop requests that have left the window
+        while self._sent and now - self._sent[0][0] >= self.WINDOW_SECONDS:
+            self._tokens_in_window -= self._sent.popleft()[1]
+
+        ready_at = max(now, self._not_before)
+        if len(self._sent) >= self.requests_per_minute:
+            # The window may also hold reservations for future send times:
+            # this request has to be a full window after the one that would
+            # otherwise be the requests_per_minute-th before it
+            ready_at = max(ready_at, self._sent[-self.requests_per_minute][0] + self.WINDOW_SECONDS)
+
+        if self.tokens_per_minute is not None:
+            # Wait until enough earlier requests have left the window to
+            # make room for this one (a request bigger than the whole
+            # budget only waits for an empty window)
+            in_window = self._tokens_in_window
+            for sent_at, sent_tokens in self._sent:
+                if in_window + tokens <= self.tokens_per_minute:
+                    break
+                in_window -= sent_tokens
+                ready_at = max(ready_at, sent_at + self.WINDOW_SECONDS)
+
+        # Reserved times only grow, so the window stays in time order
+        slot = (ready_at, tokens)
+        self._sent.append(slot)
+        self._tokens_in_window += tokens
+        self._not_before = ready_at + 1.0 / self.rate
+        return slot
+
+    def _release(self, slot: Tuple[float, int]):
+        """Give up a reserved send time (lock must be held)"""
+        try:
+            self._sent.remove(slot)
+            self._tokens_in_window -= slot[1]
+        except ValueError:
+            pass  # Already left the window
+
+    def record_success(self):
+        """Additive increase: speed up slightly after a successful request"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def record_throttled(self, retry_after: Optional[float] = None):
+        """
+        Multiplicative decrease: halve the rate after being throttled
+
+        Args:
+            retry_after: Seconds the service asked us to wait (e.g. from a
+                Retry-After header), if it said
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            backoff = retry_after if retry_after is not None else 1.0 / self.rate
+            self._throttled_until = max(self._throttled_until, time.monotonic() + backoff)
+            self._not_before = max(self._not_before, self._throttled_until)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Get how long (in seconds) a failed request asked us to wait, if it said
+
+    Looks, through the exception chain (client libraries often re-raise HTTP
+    errors as their own types), for:
+    - a Retry-After response header (seconds or HTTP-date form)
+    - a retry_delay attribute (google.api_core RetryInfo-style timedelta)
+    - a "retry in 13.5s" / "retry_delay { seconds: 13 }" hint in the message
+    """
+    while error is not None:
+        headers = getattr(error, 'headers', None)
+        if headers is not None:
+            retry_after = headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    # HTTP-date form
+                    try:
+                        retry_at = parsedate_to_datetime(retry_after)
+                        return max(0.0, retry_at.timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        return None
+
+        retry_delay = getattr(error, 'retry_delay', None)
+        if retry_delay is not None:
+            if hasattr(retry_delay, 'total_seconds'):
+                return max(0.0, retry_delay.total_seconds())
+            if isinstance(retry_delay, (int, float)):
+                return max(0.0, float(retry_delay))
+
+        match = _RETRY_IN_PATTERN.search(str(error))
+        if match:
+            return float(match.group(1) or match.group(2))
+
+        error = error.__cause__ or error.__context__
+    return None
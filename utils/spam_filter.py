@@ -0,0 +1,48 @@
+"""
+Cheap checks for spam and junk reviews
+
+Reviews that are mostly one repeated character, the same few words over and
+over, or no words at all (symbols, emoji art) carry no signal for theme
+classification, so they are dropped before being sent to the LLM.
+"""
+import re
+
+# A character repeated 6+ times in a row ("aaaaaaa", "!!!!!!!!")
+_REPEATED_CHAR_PATTERN = re.compile(r'(.)\1{5,}')
+
+# Reviews with more words than this are checked for repetition
+_MIN_WORDS_FOR_RATIO = 10
+
+# Below this share of distinct words, a review is just repeating itself
+_MIN_UNIQUE_WORD_RATIO = 0.3
+
+
+def is_spam(text: str) -> bool:
+    """
+    Check if a review looks like spam or junk
+
+    Args:
+        text: Review text
+
+    Returns:
+        True if the review has no letters, is mostly runs of one repeated
+        character, or (for longer reviews) mostly repeats the same words
+    """
+    if not text:
+        return False
+
+    if not any(char.isalpha() for char in text):
+        return True
+
+    # Genuine reviews stretch a word now and then ("sooooo slow"); junk is
+    # mostly made of runs
+    if _REPEATED_CHAR_PATTERN.search(text):
+        collapsed = _REPEATED_CHAR_PATTERN.sub(r'\1', text)
+        if len(collapsed) * 2 < len(text):
+            return True
+
+    words = text.lower().split()
+    if len(words) > _MIN_WORDS_FOR_RATIO and len(set(words)) / len(words) < _MIN_UNIQUE_WORD_RATIO:
+        return True
+
+    return False